@@ -22,6 +22,12 @@ if [ ! -d "venv" ]; then
     python3 modules/bootstrap.py
     status=$?
 else
+    if [ "$1" = "--headless" ]; then
+        echo "✅ Environment detected. Starting headless daemon (control it with: ./venv/bin/python rtmctl.py)..."
+        nohup ./venv/bin/python daemon.py "${@:2}" > /dev/null 2>&1 &
+        sleep 2
+        exit 0
+    fi
     echo "✅ Environment detected. Starting application..."
     nohup ./venv/bin/python main.py > /dev/null 2>&1 &
     sleep 2
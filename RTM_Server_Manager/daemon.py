@@ -0,0 +1,8 @@
+import sys
+from modules import headless
+
+# Headless entry point: python daemon.py [--start]
+# Control it with rtmctl.py. No PyQt5 is imported.
+
+if __name__ == "__main__":
+    sys.exit(headless.main())
@@ -1,16 +1,25 @@
 import sys
 import os
 import json
+import threading
+from modules import startup_timer
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QTextEdit, QLineEdit, QSizePolicy, QFrame,
-    QDialog, QFormLayout, QTimeEdit, QCheckBox, QComboBox, QButtonGroup
+    QPushButton, QLabel, QPlainTextEdit, QLineEdit, QSizePolicy, QFrame,
+    QDialog, QFormLayout, QTimeEdit, QCheckBox, QComboBox, QButtonGroup, QTabWidget,
+    QFileDialog, QInputDialog, QMessageBox, QProgressBar
 )
 from PyQt5.QtGui import QIcon, QPixmap, QFont
-from PyQt5.QtCore import Qt, QTime, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QTime, QTimer, pyqtSignal
 from datetime import datetime
-from modules import setup, server_control, server_settings, notifications, restart_scheduler, command_parser, welcome, performance_monitor
+from modules import server_settings, notifications, restart_scheduler, command_parser, welcome, supervisor, instances, steamcmd_runner
 from modules.config import SETTINGS_PATH
+from modules.terminal_buffer import TerminalBuffer
+from modules.dashboard import DashboardPanel
+from modules.log_viewer import LogViewer
+# setup, performance_monitor, metrics_exporter and version_checker are imported on
+# first use so they stay off the path to the first window.
+startup_timer.phase("imports")
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 # --- Path Handling for Windows Executable ---
@@ -58,6 +67,20 @@ if not os.path.exists(SETTINGS_PATH):
 DEDICATED_SERVER_DIR = os.path.join(BASE_DIR, "Dedicated Server")
 LOGO_PATH = os.path.join(BASE_DIR, "assets", "RTMSM.png")
 
+class SupervisorBridge(QObject):
+    # Re-emits supervisor state changes, instance list changes and SteamCMD progress
+    # (raised on worker threads) as Qt signals.
+    state_changed = pyqtSignal(str, str)
+    instances_changed = pyqtSignal()
+    update_progress = pyqtSignal(object)
+    update_available = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        supervisor.add_state_listener(lambda instance, state: self.state_changed.emit(instance.id, state))
+        instances.add_listener(self.instances_changed.emit)
+        steamcmd_runner.add_progress_listener(self.update_progress.emit)
+
 class MainWindow(QMainWindow):
     def load_welcome_message(self):
         try:
@@ -107,14 +130,31 @@ class MainWindow(QMainWindow):
 
         left_panel.addWidget(logo_widget, alignment=Qt.AlignTop)
 
+        # --- Instance Section ---
+        instance_label = QLabel("<b>Server Instance</b>")
+        self.instance_box = QComboBox()
+        add_instance_btn = QPushButton("Add Instance")
+        remove_instance_btn = QPushButton("Remove Instance")
+
+        self.instance_box.activated.connect(self.on_instance_selected)
+        add_instance_btn.clicked.connect(self.add_instance)
+        remove_instance_btn.clicked.connect(self.remove_instance)
+
+        left_panel.addWidget(instance_label)
+        left_panel.addWidget(self.instance_box)
+        instance_buttons = QHBoxLayout()
+        instance_buttons.addWidget(add_instance_btn)
+        instance_buttons.addWidget(remove_instance_btn)
+        left_panel.addLayout(instance_buttons)
+
         # --- Setup Section ---
         setup_label = QLabel("<b>Setup</b>")
         verify_steamcmd_btn = QPushButton("Verify SteamCMD")
         verify_rtm_btn = QPushButton("Verify RTM Files")
         setup_notifications_btn = QPushButton("Setup Notifications")
 
-        verify_steamcmd_btn.clicked.connect(lambda: setup.verify_steamcmd(self.terminal.log))
-        verify_rtm_btn.clicked.connect(lambda: setup.verify_rtm_files(self.terminal.log))
+        verify_steamcmd_btn.clicked.connect(self.verify_steamcmd)
+        verify_rtm_btn.clicked.connect(self.verify_rtm_files)
         setup_notifications_btn.clicked.connect(lambda: NotificationSetupDialog(self.terminal.log).exec_())
 
         left_panel.addWidget(setup_label)
@@ -127,15 +167,35 @@ class MainWindow(QMainWindow):
         start_btn = QPushButton("Start Server")
         stop_btn = QPushButton("Stop Server")
         restart_btn = QPushButton("Auto Restart")
-
-        start_btn.clicked.connect(lambda: server_control.start_server(self.terminal.log))
-        stop_btn.clicked.connect(lambda: server_control.stop_server(self.terminal.log))
+        dashboard_btn = QPushButton("Performance Dashboard")
+        self.status_label = QLabel()
+        self.start_btn = start_btn
+        self.stop_btn = stop_btn
+
+        self.update_bar = QProgressBar()
+        self.update_bar.setRange(0, 1000)
+        self.update_bar.setTextVisible(True)
+        self.update_label = QLabel()
+        self.update_label.setWordWrap(True)
+        self.cancel_update_btn = QPushButton("Cancel Update")
+        self.cancel_update_btn.clicked.connect(self.cancel_update)
+        for widget in (self.update_bar, self.update_label, self.cancel_update_btn):
+            widget.hide()
+
+        start_btn.clicked.connect(lambda: supervisor.submit("start", self.terminal.log))
+        stop_btn.clicked.connect(lambda: supervisor.submit("stop", self.terminal.log))
         restart_btn.clicked.connect(lambda: RestartSchedulerDialog(self.terminal.log).exec_())
+        dashboard_btn.clicked.connect(lambda: self.dashboard.setVisible(not self.dashboard.isVisible()))
 
         left_panel.addWidget(control_label)
+        left_panel.addWidget(self.status_label)
+        left_panel.addWidget(self.update_bar)
+        left_panel.addWidget(self.update_label)
+        left_panel.addWidget(self.cancel_update_btn)
         left_panel.addWidget(start_btn)
         left_panel.addWidget(stop_btn)
         left_panel.addWidget(restart_btn)
+        left_panel.addWidget(dashboard_btn)
 
         # --- Server Settings Section ---
         settings_label = QLabel("<b>Server Settings</b>")
@@ -143,7 +203,7 @@ class MainWindow(QMainWindow):
         permissions_btn = QPushButton("Edit Permissions")
         rules_btn = QPushButton("Edit Rules")
 
-        config_btn.clicked.connect(lambda: server_settings.open_config_editor(self.terminal.log))
+        config_btn.clicked.connect(self.open_config_editor)
         permissions_btn.clicked.connect(lambda: server_settings.open_permissions_editor(self.terminal.log))
         rules_btn.clicked.connect(lambda: server_settings.open_rules_editor(self.terminal.log))
 
@@ -155,22 +215,133 @@ class MainWindow(QMainWindow):
         left_panel.addStretch()
 
         self.terminal = TerminalWidget()
+        self.log_viewer = LogViewer()
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.terminal, "Terminal")
+        self.tabs.addTab(self.log_viewer, "Log Viewer")
         left_frame = QFrame()
         left_frame.setLayout(left_panel)
 
         main_layout.addWidget(left_frame, 1)
-        main_layout.addWidget(self.terminal, 2)
+        main_layout.addWidget(self.tabs, 2)
+
+        self.dashboard = DashboardPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.dashboard)
+        self.dashboard.hide()
+
+        self.supervisor_bridge = SupervisorBridge()
+        self.supervisor_bridge.state_changed.connect(self.on_server_state)
+        self.supervisor_bridge.instances_changed.connect(self.refresh_instances)
+        self.supervisor_bridge.update_progress.connect(self.on_update_progress)
+        self.supervisor_bridge.update_available.connect(self.on_update_available)
+        self.refresh_instances()
+
+    def finish_startup(self):
+        # Runs from the event loop once the window is up; everything here can wait a frame.
+        startup_timer.phase("first show")
+        from modules import performance_monitor, metrics_exporter
+        performance_monitor.start_monitoring(self.terminal.log)
+        restart_scheduler.start_watchdog(self.terminal.log)
+        metrics_exporter.start_if_enabled(self.terminal.log)
+        startup_timer.phase("background services")
+        for line in startup_timer.report():
+            self.terminal.log(line)
+        threading.Thread(target=self._check_for_update, daemon=True).start()
+
+    def _check_for_update(self):
+        from modules import version_checker
+        latest_version = version_checker.fetch_update(self.terminal.log)
+        if latest_version:
+            self.supervisor_bridge.update_available.emit(latest_version)
+
+    def on_update_available(self, latest_version):
+        from modules import version_checker
+        version_checker.prompt_update(self, latest_version)
+
+    def open_config_editor(self):
+        from modules.config_editor import ConfigEditorDialog
+        ConfigEditorDialog(self.terminal.log).exec_()
+
+    def verify_steamcmd(self):
+        from modules import setup
+        setup.verify_steamcmd(self.terminal.log)
+
+    def verify_rtm_files(self):
+        from modules import setup
+        setup.verify_rtm_files(self.terminal.log)
+
+    def refresh_instances(self):
+        active = instances.active()
+        self.instance_box.clear()
+        for instance in instances.list_instances():
+            self.instance_box.addItem(instance.name, instance.id)
+        self.instance_box.setCurrentIndex(self.instance_box.findData(active.id))
+        self.on_server_state(active.id, active.state)
+
+    def on_instance_selected(self, index):
+        instances.set_active(self.instance_box.itemData(index))
+
+    def add_instance(self):
+        name, ok = QInputDialog.getText(self, "Add Instance", "Instance name:")
+        if not ok or not name.strip():
+            return
+        path = QFileDialog.getExistingDirectory(self, "Select RTM Server Install Directory")
+        if not path:
+            return
+        instance = instances.add_instance(name.strip(), path)
+        instances.set_active(instance.id)
+        self.terminal.log(f"✅ Added server instance '{instance.name}' at {path}")
+
+    def remove_instance(self):
+        instance = instances.active()
+        if instance.id == instances.DEFAULT_INSTANCE_ID:
+            self.terminal.log("⚠️ The default instance cannot be removed.")
+            return
+        reply = QMessageBox.question(self, "Remove Instance", f"Remove '{instance.name}' from the manager? Server files are kept.")
+        if reply != QMessageBox.Yes:
+            return
+        try:
+            instances.remove_instance(instance.id)
+            self.terminal.log(f"🗑️ Removed server instance '{instance.name}'.")
+        except ValueError as e:
+            self.terminal.log(f"⚠️ {e}")
+
+    def on_server_state(self, instance_id, state):
+        if instance_id != instances.active().id:
+            return
+        self.status_label.setText(f"Status: <b>{state.capitalize()}</b>")
+        self.start_btn.setEnabled(state in (supervisor.STATE_STOPPED, supervisor.STATE_CRASHED))
+        self.stop_btn.setEnabled(state in (supervisor.STATE_STARTING, supervisor.STATE_RUNNING))
+
+    def on_update_progress(self, progress):
+        if progress is None:
+            for widget in (self.update_bar, self.update_label, self.cancel_update_btn):
+                widget.hide()
+            self.cancel_update_btn.setEnabled(True)
+            return
+        self.update_bar.setValue(int(progress.percent * 10))
+        self.update_bar.setFormat(f"{progress.state.capitalize()} %p%")
+        self.update_label.setText(steamcmd_runner.format_progress(progress))
+        for widget in (self.update_bar, self.update_label, self.cancel_update_btn):
+            widget.show()
+
+    def cancel_update(self):
+        if steamcmd_runner.cancel():
+            self.cancel_update_btn.setEnabled(False)
 
 class TerminalWidget(QWidget):
-    append_text_signal = pyqtSignal(str)
+    FLUSH_INTERVAL_MS = 75
+    SCROLLBACK_PAGE = 500
+
     def __init__(self):
         super().__init__()
         layout = QVBoxLayout()
-        self.append_text_signal.connect(self._append_text)
-        self.output_area = QTextEdit()
+        self.buffer = TerminalBuffer()
+        self.output_area = QPlainTextEdit()
         self.output_area.setReadOnly(True)
         self.output_area.setFont(QFont("Courier New", 10))
-
+        self.output_area.setMaximumBlockCount(self.buffer.capacity)
+        self.output_area.verticalScrollBar().valueChanged.connect(self._on_scroll)
 
         self.input_line = QLineEdit()
         self.input_line.setPlaceholderText("Enter command here...")
@@ -180,6 +351,12 @@ class TerminalWidget(QWidget):
         layout.addWidget(self.input_line)
         self.setLayout(layout)
 
+        # Lines from any thread are coalesced in the buffer and painted in batches.
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self._flush)
+        self.flush_timer.start()
+
         self.load_welcome_message()
 
     def load_welcome_message(self):
@@ -189,8 +366,7 @@ class TerminalWidget(QWidget):
             self.log(f"❌ Failed to load welcome message: {e}")
 
     def log(self, message):
-        timestamp = datetime.now().strftime("[%H:%M:%S]")
-        self.append_text_signal.emit(f"{timestamp} {message}")
+        self.buffer.append(message, datetime.now())
 
     def send_command(self):
         cmd = self.input_line.text().strip()
@@ -199,10 +375,37 @@ class TerminalWidget(QWidget):
             command_parser.handle_command(cmd, self.log)
         self.input_line.clear()
 
-    def _append_text(self, message):
-        self.output_area.append(message)
-        self.output_area.moveCursor(self.output_area.textCursor().End)
-        self.output_area.ensureCursorVisible()
+    def _flush(self):
+        lines = self.buffer.drain()
+        if lines:
+            # appendPlainText keeps the view pinned to the bottom only if it already was.
+            self.output_area.appendPlainText("\n".join(lines))
+
+    def _first_visible_line(self):
+        return max(0, self.buffer.total_lines - self.output_area.document().blockCount())
+
+    def _on_scroll(self, value):
+        bar = self.output_area.verticalScrollBar()
+        if value == 0:
+            self._load_scrollback()
+        elif value == bar.maximum() and self.output_area.maximumBlockCount() != self.buffer.capacity:
+            # Back at the live tail: drop the paged-in history again.
+            self.output_area.setMaximumBlockCount(self.buffer.capacity)
+
+    def _load_scrollback(self):
+        first = self._first_visible_line()
+        if first == 0:
+            return
+
+        older = self.buffer.read_history(first, self.SCROLLBACK_PAGE)
+        if not older:
+            return
+
+        self.output_area.setMaximumBlockCount(self.output_area.maximumBlockCount() + len(older))
+        cursor = self.output_area.textCursor()
+        cursor.movePosition(cursor.Start)
+        cursor.insertText("\n".join(older) + "\n")
+        self.output_area.verticalScrollBar().setValue(len(older))
 
 class NotificationSetupDialog(QDialog):
     def __init__(self, log_callback):
@@ -261,7 +464,8 @@ class NotificationSetupDialog(QDialog):
 class RestartSchedulerDialog(QDialog):
     def __init__(self, log_callback):
         super().__init__()
-        self.setWindowTitle("Schedule Auto Restart")
+        self.instance = instances.active()
+        self.setWindowTitle(f"Schedule Auto Restart – {self.instance.name}")
         self.setMinimumWidth(400)
         self.log = log_callback
 
@@ -270,17 +474,25 @@ class RestartSchedulerDialog(QDialog):
         # Mode selection
         self.hourly_check = QCheckBox("Hourly Restart")
         self.designated_check = QCheckBox("Designated Time Restart")
+        self.auto_check = QCheckBox("Daily at Least Populated Hour (from player history)")
+        self.adaptive_check = QCheckBox("Adaptive (restart when players are offline, within an uptime window)")
 
         self.mode_group = QButtonGroup(self)
         self.mode_group.setExclusive(True)
         self.mode_group.addButton(self.hourly_check)
         self.mode_group.addButton(self.designated_check)
+        self.mode_group.addButton(self.auto_check)
+        self.mode_group.addButton(self.adaptive_check)
 
         self.hourly_check.clicked.connect(self.toggle_mode)
         self.designated_check.clicked.connect(self.toggle_mode)
+        self.auto_check.clicked.connect(self.toggle_mode)
+        self.adaptive_check.clicked.connect(self.toggle_mode)
 
         layout.addWidget(self.hourly_check)
         layout.addWidget(self.designated_check)
+        layout.addWidget(self.auto_check)
+        layout.addWidget(self.adaptive_check)
 
         # Hourly config
         self.freq_dropdown = QComboBox()
@@ -294,9 +506,22 @@ class RestartSchedulerDialog(QDialog):
 
         layout.addWidget(QLabel("Restart Frequency (1–24 hrs):"))
         layout.addWidget(self.freq_dropdown)
-        layout.addWidget(QLabel("Restart at specific 24H time (HH:MM):"))
+        layout.addWidget(QLabel("Restart at specific 24H time (HH:MM, fallback for auto):"))
         layout.addWidget(self.time_picker)
 
+        # Adaptive config
+        self.min_uptime_dropdown = QComboBox()
+        self.min_uptime_dropdown.addItems([str(i) for i in range(1, 49)])
+        self.max_uptime_dropdown = QComboBox()
+        self.max_uptime_dropdown.addItems([str(i) for i in range(1, 49)])
+        self.max_players_dropdown = QComboBox()
+        self.max_players_dropdown.addItems([str(i) for i in range(0, 11)])
+        adaptive_form = QFormLayout()
+        adaptive_form.addRow("Restart window opens after (hrs up):", self.min_uptime_dropdown)
+        adaptive_form.addRow("Restart no later than (hrs up):", self.max_uptime_dropdown)
+        adaptive_form.addRow("Restart early with at most (players):", self.max_players_dropdown)
+        layout.addLayout(adaptive_form)
+
         # Common options
         self.enable_box = QCheckBox("Enable Automatic Restarts")
         self.warning_box = QCheckBox("Enable Restart Warnings")
@@ -312,15 +537,13 @@ class RestartSchedulerDialog(QDialog):
         self.load_settings()
 
     def toggle_mode(self):
-        if self.hourly_check.isChecked():
-            self.freq_dropdown.setEnabled(True)
-            self.time_picker.setEnabled(False)
-        elif self.designated_check.isChecked():
-            self.freq_dropdown.setEnabled(False)
-            self.time_picker.setEnabled(True)
+        self.freq_dropdown.setEnabled(self.hourly_check.isChecked())
+        self.time_picker.setEnabled(self.designated_check.isChecked() or self.auto_check.isChecked())
+        for dropdown in (self.min_uptime_dropdown, self.max_uptime_dropdown, self.max_players_dropdown):
+            dropdown.setEnabled(self.adaptive_check.isChecked())
 
     def load_settings(self):
-        settings = restart_scheduler.load_restart_settings()
+        settings = restart_scheduler.load_restart_settings(self.instance)
         mode = settings.get("mode", "hourly")
 
         self.enable_box.setChecked(settings.get("enabled", False))
@@ -328,15 +551,28 @@ class RestartSchedulerDialog(QDialog):
 
         self.freq_dropdown.setCurrentText(str(settings.get("frequency", 1)))
         self.time_picker.setTime(QTime.fromString(settings.get("start_time", "00:00"), "HH:mm"))
+        self.min_uptime_dropdown.setCurrentText(str(settings.get("min_uptime_hours", restart_scheduler.DEFAULT_MIN_UPTIME_HOURS)))
+        self.max_uptime_dropdown.setCurrentText(str(settings.get("max_uptime_hours", restart_scheduler.DEFAULT_MAX_UPTIME_HOURS)))
+        self.max_players_dropdown.setCurrentText(str(settings.get("max_players", 0)))
 
         if mode == "hourly":
             self.hourly_check.setChecked(True)
         elif mode == "designated":
             self.designated_check.setChecked(True)
+        elif mode == "auto":
+            self.auto_check.setChecked(True)
+        elif mode == "adaptive":
+            self.adaptive_check.setChecked(True)
         self.toggle_mode()
 
     def save_settings(self):
-        mode = "hourly" if self.hourly_check.isChecked() else "designated"
+        modes = {self.hourly_check: "hourly", self.auto_check: "auto", self.adaptive_check: "adaptive"}
+        mode = next((name for box, name in modes.items() if box.isChecked()), "designated")
+        min_uptime = int(self.min_uptime_dropdown.currentText())
+        max_uptime = int(self.max_uptime_dropdown.currentText())
+        if mode == "adaptive" and min_uptime > max_uptime:
+            QMessageBox.warning(self, "Invalid Window", "The restart window must open before the uptime limit.")
+            return
         now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         data = {
             "enabled": self.enable_box.isChecked(),
@@ -344,20 +580,22 @@ class RestartSchedulerDialog(QDialog):
             "mode": mode,
             "frequency": int(self.freq_dropdown.currentText()) if mode == "hourly" else 1,
             "start_time": self.time_picker.time().toString("HH:mm"),
-            "last_start": now_str if mode == "hourly" else None
+            "last_start": now_str if mode == "hourly" else None,
+            "min_uptime_hours": min_uptime,
+            "max_uptime_hours": max_uptime,
+            "max_players": int(self.max_players_dropdown.currentText()),
         }
 
-        restart_scheduler.save_restart_settings(data)
+        restart_scheduler.save_restart_settings(data, self.instance)
         self.log(f"✅ Restart schedule saved in {mode} mode.")
         self.accept()
 
 if __name__ == "__main__":
             
     app = QApplication(sys.argv)
+    startup_timer.phase("qt init")
     window = MainWindow()
+    startup_timer.phase("window")
     window.show()
-    performance_monitor.start_monitoring(window.terminal.log)
-    restart_scheduler.start_watchdog(window.terminal.log)
-    from modules.version_checker import check_for_update_gui
-    check_for_update_gui(window)
+    QTimer.singleShot(0, window.finish_startup)
     sys.exit(app.exec_())
@@ -1,7 +1,7 @@
 import os
 import sys
 
-from modules import server_control, restart_scheduler
+from modules import server_control, restart_scheduler, supervisor, instances, permissions
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = os.path.dirname(sys.executable)
@@ -9,19 +9,67 @@ else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def handle_command(cmd, log):
+    raw = cmd.strip()  # player names and rule text keep their case
     cmd = cmd.lower()
+    instance = instances.active()
+    args = raw.split(maxsplit=1)[1].strip() if " " in raw else ""
 
-    if cmd == "start":
-        server_control.start_server(log)
-    elif cmd == "stop":
-        server_control.stop_server(log)
-    elif cmd == "restart":
-        log("🔁 Restarting server...")
-        server_control.stop_server(log)
-        server_control.start_server(log)
+    if cmd in ("start", "stop", "restart", "validate", "prestage"):
+        supervisor.submit(cmd, log)
     elif cmd == "status":
-        running = server_control.is_server_running()
+        running = server_control.is_server_running(instance)
+        log(f"🖥️ Instance: {instance.name}")
         log("✅ Server is running." if running else "❌ Server is stopped.")
+        log(f"ℹ️ Supervisor state: {supervisor.get_state(instance)}")
+    elif cmd == "instances":
+        for item in instances.list_instances():
+            marker = "▶" if item is instance else " "
+            log(f"{marker} {item.name} ({item.id}) | {item.state} | {item.server_path or 'no path set'}")
+    elif cmd.startswith("use "):
+        target = instances.find(cmd[4:])
+        if target:
+            instances.set_active(target.id)
+            log(f"🖥️ Switched to instance: {target.name}")
+        else:
+            log(f"❓ Unknown instance: {cmd[4:].strip()}")
+    elif cmd == "config check":
+        from modules import server_config
+        server_config.report(instance, log)
+    elif cmd.startswith("ban "):
+        permissions.ban(instance, args, log)
+    elif cmd.startswith("unban "):
+        permissions.unban(instance, args, log)
+    elif cmd == "banned":
+        permissions.list_blocked(instance, log)
+    elif cmd.startswith("permissions import ") or cmd.startswith("permissions import! "):
+        path = args.split(maxsplit=1)[1] if " " in args else ""
+        permissions.import_permissions(instance, path, log, replace=cmd.startswith("permissions import!"))
+    elif cmd.startswith("permissions export "):
+        permissions.export_permissions(instance, args.split(maxsplit=1)[1], log)
+    elif cmd.startswith("permissions "):
+        permissions.show(instance, args, log)
+    elif cmd.startswith("permit "):
+        name, _, options = args.partition(" ")
+        if options.strip():
+            permissions.set_options(instance, name, options, log)
+        else:
+            log("❓ Usage: permit <name> <Option,Option>")
+    elif cmd == "rules":
+        permissions.list_rules(instance, log)
+    elif cmd.startswith("rule add "):
+        permissions.add_rule(instance, raw.split(maxsplit=2)[2], log)
+    elif cmd.startswith("rule remove "):
+        permissions.remove_rule(instance, raw.split(maxsplit=2)[2], log)
+    elif cmd.startswith("sessions "):
+        from modules import player_history
+        player_history.log_player(args, log)
+    elif cmd == "peak hours":
+        from modules import player_history
+        player_history.log_profile(instance, log)
+    elif cmd == "cancel update":
+        from modules import steamcmd_runner
+        if not steamcmd_runner.cancel():
+            log("ℹ️ No SteamCMD update is running.")
     elif cmd == "watchdog on":
         restart_scheduler.start_watchdog(log)
     elif cmd == "watchdog off":
@@ -37,6 +85,15 @@ def handle_command(cmd, log):
         from modules import performance_monitor
         performance_monitor.stop_monitoring()
         log("❌ Performance monitor stopped.")
+    elif cmd == "exporter on":
+        from modules import metrics_exporter
+        metrics_exporter.set_enabled(True, log)
+    elif cmd == "exporter off":
+        from modules import metrics_exporter
+        metrics_exporter.set_enabled(False, log)
+    elif cmd == "stats":
+        from modules import performance_monitor
+        performance_monitor.log_history(log)
     elif cmd == "help":
         from modules import welcome
         welcome.print_welcome(log)
@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QGroupBox, QScrollArea, QWidget,
+    QLineEdit, QComboBox, QCheckBox, QLabel, QPushButton
+)
+from modules import server_config, server_settings, instances
+
+
+class ConfigEditorDialog(QDialog):
+    # Form over MoriaServerConfig.ini built from the file itself: one row per key in file
+    # order, typed widgets for keys in server_config.SCHEMA, the file's own comments as
+    # tooltips. Edits are validated as they are typed and Save stays disabled while
+    # anything is invalid.
+
+    def __init__(self, log_callback):
+        super().__init__()
+        self.log = log_callback
+        self.instance = instances.active()
+        self.setWindowTitle(f"Server Config – {self.instance.name}")
+        self.setMinimumSize(560, 640)
+        self.document = None
+        self.widgets = []  # (section, key, widget)
+
+        layout = QVBoxLayout()
+        path = server_settings.prepare_config_file(self.log)
+        try:
+            self.document = server_config.load(self.instance) if path else None
+        except OSError as e:
+            self.log(f"❌ Could not read {server_config.CONFIG_FILE}: {e}")
+
+        if self.document is None:
+            layout.addWidget(QLabel(f"{server_config.CONFIG_FILE} could not be loaded."))
+        else:
+            layout.addWidget(self._build_form(), 1)
+
+        self.issues_label = QLabel()
+        self.issues_label.setWordWrap(True)
+        self.changes_label = QLabel()
+        self.changes_label.setWordWrap(True)
+        layout.addWidget(self.issues_label)
+        layout.addWidget(self.changes_label)
+
+        buttons = QHBoxLayout()
+        external_btn = QPushButton("Open in Text Editor")
+        self.save_btn = QPushButton("Save")
+        self.apply_btn = QPushButton("Save && Restart if Needed")
+        cancel_btn = QPushButton("Cancel")
+        external_btn.clicked.connect(self.open_external)
+        self.save_btn.clicked.connect(lambda: self.save(restart_if_needed=False))
+        self.apply_btn.clicked.connect(lambda: self.save(restart_if_needed=True))
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(external_btn)
+        buttons.addStretch()
+        buttons.addWidget(self.save_btn)
+        buttons.addWidget(self.apply_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        self.refresh()
+
+    def _build_form(self):
+        container = QWidget()
+        column = QVBoxLayout(container)
+        forms = {}
+        for section, key, value in self.document.items():
+            if section.lower() not in forms:
+                box = QGroupBox(section or "(no section)")
+                forms[section.lower()] = QFormLayout(box)
+                column.addWidget(box)
+            widget = self._make_widget(server_config.schema_field(section, key), value)
+            widget.setToolTip(self.document.help(section, key))
+            forms[section.lower()].addRow(key, widget)
+            self.widgets.append((section, key, widget))
+        column.addStretch()
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(container)
+        return scroll
+
+    def _make_widget(self, field, value):
+        if field and field.kind == "choice":
+            widget = QComboBox()
+            widget.addItems(field.choices)
+            if value.lower() not in field.choices:
+                widget.addItem(value)
+            widget.setCurrentIndex(max(0, widget.findText(value.lower() if value.lower() in field.choices else value)))
+            widget.currentIndexChanged.connect(self.refresh)
+        elif field and field.kind == "bool":
+            widget = QCheckBox()
+            widget.setChecked(value.lower() == "true")
+            widget.stateChanged.connect(self.refresh)
+        else:
+            widget = QLineEdit(value)
+            widget.textChanged.connect(self.refresh)
+        return widget
+
+    def _edited(self):
+        # A copy of the document with the form applied; unchanged lines stay byte-identical.
+        edited = server_config.ConfigDocument(self.document.render())
+        edited.bom = self.document.bom
+        for section, key, widget in self.widgets:
+            original = self.document.get(section, key, "")
+            if isinstance(widget, QComboBox):
+                value = widget.currentText()
+            elif isinstance(widget, QCheckBox):
+                value = "true" if widget.isChecked() else "false"
+            else:
+                value = widget.text()
+            if not isinstance(widget, QLineEdit) and value.lower() == original.lower():
+                value = original  # keep the file's spelling of keywords
+            edited.set(section, key, value)
+        return edited
+
+    def refresh(self, *_):
+        if self.document is None:
+            self.save_btn.setEnabled(False)
+            self.apply_btn.setEnabled(False)
+            return
+        edited = self._edited()
+        issues = server_config.validate(edited)
+        self.issues_label.setText("\n".join(server_config.format_issue(i) for i in issues) or "✅ No problems found.")
+        invalid = bool(server_config.errors(issues))
+        self.save_btn.setEnabled(not invalid)
+        self.apply_btn.setEnabled(not invalid)
+
+        changes = server_config.diff(self.document.values(), edited.values(), edited.labels())
+        if not changes:
+            self.changes_label.setText("No unsaved changes.")
+        else:
+            restart = "needs a restart" if server_config.needs_restart(changes) else "no restart needed"
+            self.changes_label.setText(f"{len(changes)} unsaved change(s), {restart}:\n" +
+                                       "\n".join(server_config.format_change(c) for c in changes))
+
+    def save(self, restart_if_needed):
+        if server_config.save_and_apply(self.instance, self._edited(), self.log, restart_if_needed):
+            self.accept()
+
+    def open_external(self):
+        server_settings.open_config_editor(self.log)
+        self.reject()
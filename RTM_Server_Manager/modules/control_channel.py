@@ -0,0 +1,65 @@
+import os
+import sys
+import secrets
+import platform
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+# Local control channel between the headless daemon and rtmctl.
+# A Unix socket next to the manager on Linux/macOS, a named pipe on Windows; either way
+# connections must present the key in .control_key (readable by the owner only), so
+# other local users can't drive the servers. Standard library only, so the client
+# starts instantly.
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IS_WINDOWS = platform.system() == "Windows"
+KEY_PATH = os.path.join(BASE_DIR, "modules", ".control_key")
+
+# Message kinds sent by the daemon.
+MSG_LINE = "line"
+MSG_DONE = "done"
+
+def address():
+    if IS_WINDOWS:
+        return r"\\.\pipe\rtm-server-manager"
+    return os.path.join(BASE_DIR, "rtm_manager.sock")
+
+def family():
+    return "AF_PIPE" if IS_WINDOWS else "AF_UNIX"
+
+def _load_key(create):
+    try:
+        with open(KEY_PATH, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        if not create:
+            raise
+    key = secrets.token_hex(32).encode("ascii")
+    fd = os.open(KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+def listen():
+    if not IS_WINDOWS and os.path.exists(address()):
+        os.remove(address())
+    listener = Listener(address(), family(), authkey=_load_key(create=True))
+    if not IS_WINDOWS:
+        os.chmod(address(), 0o600)
+    return listener
+
+def connect():
+    return Client(address(), family(), authkey=_load_key(create=False))
+
+def is_daemon_running():
+    try:
+        connect().close()
+        return True
+    except AuthenticationError:
+        return True
+    except (OSError, EOFError):
+        return False
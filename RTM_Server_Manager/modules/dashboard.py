@@ -0,0 +1,164 @@
+from collections import deque
+from PyQt5.QtWidgets import QDockWidget, QWidget, QVBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtGui import QPainter, QPixmap, QPen, QColor
+from PyQt5.QtCore import Qt, QTimer, QPointF
+from modules import metrics_store, settings_store, instances
+
+DEFAULT_REFRESH_MS = 1000
+PIXELS_PER_SAMPLE = 2
+
+# (metric, title, unit)
+CHARTS = (
+    ("cpu", "CPU", "%"),
+    ("rss_mb", "Memory (RSS)", "MB"),
+    ("threads", "Threads", ""),
+    ("handles", "Handles", ""),
+    ("disk_kbps", "Disk I/O", "KB/s"),
+    ("net_kbps", "Network I/O (host)", "KB/s"),
+)
+
+
+class Sparkline(QWidget):
+    # Fixed-width chart drawn into an off-screen pixmap. Each new sample scrolls the
+    # pixmap and paints only the newest segment; a full repaint happens only when the
+    # vertical scale changes or the widget is resized.
+
+    def __init__(self, color="#3daee9"):
+        super().__init__()
+        self.setMinimumHeight(40)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.pen = QPen(QColor(color), 1.5)
+        self.values = deque(maxlen=600)
+        self.scale = 1.0
+        self.canvas = QPixmap()
+
+    def push(self, value):
+        self.values.append(value)
+        peak = max(self.values)
+        if value > self.scale or peak * 2.5 < self.scale or self.canvas.isNull():
+            self.rescale()
+        else:
+            self._draw_tail()
+        self.update()
+
+    def rescale(self):
+        self.scale = max(self.values, default=0) * 1.25 or 1.0
+        self._redraw()
+
+    def resizeEvent(self, event):
+        self.values = deque(self.values, maxlen=max(2, self.width() // PIXELS_PER_SAMPLE + 1))
+        self._redraw()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.canvas)
+
+    def _y(self, value):
+        height = self.height() - 2
+        return 1 + height - (value / self.scale) * height
+
+    def _redraw(self):
+        if self.width() <= 0 or self.height() <= 0:
+            return
+        self.canvas = QPixmap(self.size())
+        self.canvas.fill(Qt.transparent)
+        if len(self.values) < 2:
+            return
+        painter = QPainter(self.canvas)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.pen)
+        x = self.width() - (len(self.values) - 1) * PIXELS_PER_SAMPLE
+        points = [QPointF(x + i * PIXELS_PER_SAMPLE, self._y(v)) for i, v in enumerate(self.values)]
+        painter.drawPolyline(*points)
+        painter.end()
+
+    def _draw_tail(self):
+        if len(self.values) < 2:
+            return
+        width = self.width()
+        self.canvas.scroll(-PIXELS_PER_SAMPLE, 0, self.canvas.rect())
+        painter = QPainter(self.canvas)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(width - PIXELS_PER_SAMPLE, 0, PIXELS_PER_SAMPLE, self.height(), Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.pen)
+        painter.drawLine(
+            QPointF(width - 1 - PIXELS_PER_SAMPLE, self._y(self.values[-2])),
+            QPointF(width - 1, self._y(self.values[-1])),
+        )
+        painter.end()
+
+
+class DashboardPanel(QDockWidget):
+    def __init__(self, parent=None):
+        super().__init__("Performance", parent)
+        self.setObjectName("performance_dashboard")
+        self.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea | Qt.BottomDockWidgetArea)
+
+        body = QWidget()
+        layout = QVBoxLayout()
+        self.labels = {}
+        self.charts = {}
+        for metric, title, unit in CHARTS:
+            label = QLabel(f"<b>{title}</b>: –")
+            chart = Sparkline()
+            layout.addWidget(label)
+            layout.addWidget(chart)
+            self.labels[metric] = (label, title, unit)
+            self.charts[metric] = chart
+        layout.addStretch()
+        body.setLayout(layout)
+        self.setWidget(body)
+
+        self._last_timestamp = None
+        self._instance = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.set_refresh_interval(settings_store.get("dashboard_refresh_ms", DEFAULT_REFRESH_MS))
+        self.visibilityChanged.connect(self._on_visibility)
+
+    def set_refresh_interval(self, milliseconds):
+        self.timer.setInterval(max(100, int(milliseconds)))
+
+    def _on_visibility(self, visible):
+        if visible:
+            self._backfill()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def _backfill(self):
+        # Seed each chart with the raw samples that fit its width.
+        self._instance = instances.active()
+        self.setWindowTitle(f"Performance – {self._instance.name}")
+        store = self._instance.metrics
+        for metric, chart in self.charts.items():
+            rows = store.query(metric, resolution=metrics_store.RESOLUTION_RAW)
+            chart.values.clear()
+            chart.values.extend(row[1] for row in rows[-chart.values.maxlen:])
+            chart.rescale()
+            chart.update()
+        latest = store.latest()
+        self._last_timestamp = latest[0] if latest else None
+        if latest:
+            self._update_labels(latest[1])
+
+    def refresh(self):
+        if instances.active() is not self._instance:
+            self._backfill()
+            return
+        latest = self._instance.metrics.latest()
+        if not latest or latest[0] == self._last_timestamp:
+            return
+        self._last_timestamp, sample = latest
+        for metric, chart in self.charts.items():
+            if metric in sample:
+                chart.push(sample[metric])
+        self._update_labels(sample)
+
+    def _update_labels(self, sample):
+        for metric, (label, title, unit) in self.labels.items():
+            if metric in sample:
+                label.setText(f"<b>{title}</b>: {sample[metric]:.1f} {unit}")
@@ -0,0 +1,46 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+from modules.logger import log_error
+
+# In-process publish/subscribe for typed server events.
+# Handlers run synchronously on the publishing thread, so keep them short.
+
+ServerEvent = namedtuple("ServerEvent", ["kind", "time", "data", "line"])
+
+# Event kinds published by output_parser and the supervisor.
+PLAYER_LOGIN = "player_login"
+PLAYER_JOINED = "player_joined"
+PLAYER_LEFT = "player_left"
+WORLD_SAVED = "world_saved"
+SERVER_READY = "server_ready"
+SERVER_ERROR = "server_error"
+SERVER_FATAL = "server_fatal"
+SERVER_SHUTDOWN = "server_shutdown"
+SERVER_EXITED = "server_exited"
+
+ALL = "*"
+
+_lock = threading.Lock()
+_subscribers = {}
+
+def subscribe(kind, callback):
+    with _lock:
+        _subscribers.setdefault(kind, []).append(callback)
+
+def unsubscribe(kind, callback):
+    with _lock:
+        callbacks = _subscribers.get(kind, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+def publish(kind, data=None, line=None):
+    event = ServerEvent(kind, datetime.now(), data or {}, line)
+    with _lock:
+        callbacks = list(_subscribers.get(kind, ())) + list(_subscribers.get(ALL, ()))
+    for callback in callbacks:
+        try:
+            callback(event)
+        except Exception as e:
+            log_error(f"[event_bus] Handler for '{kind}' failed: {e}")
+    return event
@@ -0,0 +1,162 @@
+import os
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
+from multiprocessing import AuthenticationError
+import psutil
+from modules import control_channel, command_parser, supervisor, instances, restart_scheduler, performance_monitor, server_control, log_sink
+from modules.logger import log_error
+
+# Runs the manager without a GUI: supervisor, scheduler, monitor, exporter and
+# notifications, driven by the same terminal commands as the GUI over
+# control_channel (see rtmctl.py). Nothing here, nor anything it imports, may pull in PyQt5.
+
+_followers = set()
+_followers_lock = threading.Lock()
+_shutdown = threading.Event()
+
+# Daemon-only commands, handled before command_parser.
+CMD_QUIT = "daemon stop"
+
+
+class _Session:
+    # One client connection; sends may come from any thread that logs.
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.open = True
+
+    def send(self, kind, payload=None):
+        if not self.open:
+            return
+        try:
+            with self.lock:
+                self.conn.send((kind, payload))
+        except (OSError, ValueError, EOFError):
+            self.open = False
+
+
+def log(message):
+    stamp = datetime.now()
+    log_sink.terminal.write(message, stamp)
+    try:
+        print(f"[{stamp.strftime('%H:%M:%S')}] {message}", flush=True)
+    except (OSError, ValueError):
+        pass
+    with _followers_lock:
+        followers = list(_followers)
+    for session in followers:
+        session.send(control_channel.MSG_LINE, message)
+
+def _serve(conn):
+    session = _Session(conn)
+    try:
+        request = conn.recv()
+        command = str(request.get("command", "")).strip()
+        follow = bool(request.get("follow"))
+
+        if follow:
+            with _followers_lock:
+                _followers.add(session)
+            reply = log
+        else:
+            def reply(message):
+                # Output from queued work can arrive after the client has gone; it still
+                # reaches the daemon log.
+                log(message)
+                session.send(control_channel.MSG_LINE, message)
+
+        if command:
+            log(f"> {command}")
+            if command.lower() == CMD_QUIT:
+                reply("👋 Stopping servers and shutting the daemon down...")
+                _shutdown.set()
+            else:
+                command_parser.handle_command(command, reply)
+        session.send(control_channel.MSG_DONE)
+
+        if follow:
+            # Attached clients never send again; recv() returns when they disconnect.
+            conn.recv()
+    except (EOFError, OSError):
+        pass
+    except Exception as e:
+        log_error(f"[headless] Control session failed: {e}")
+    finally:
+        session.open = False
+        with _followers_lock:
+            _followers.discard(session)
+        conn.close()
+
+def _accept_loop(listener):
+    while not _shutdown.is_set():
+        try:
+            conn = listener.accept()
+        except AuthenticationError:
+            log_error("[headless] Rejected a control connection with a wrong key.")
+            continue
+        except OSError:
+            if _shutdown.is_set():
+                return
+            log_error("[headless] Control socket accept failed.")
+            time.sleep(1)
+            continue
+        threading.Thread(target=_serve, args=(conn,), daemon=True).start()
+
+def _stop_all_servers():
+    pending = []
+    for instance in instances.list_instances():
+        if server_control.is_server_running(instance):
+            pending.append(supervisor.submit("stop", log, instance))
+    policy = server_control.shutdown_policy()
+    timeout = sum(policy[key] for key in ("exit_timeout", "terminate_timeout", "kill_timeout")) + 10
+    for done in pending:
+        done.wait(timeout)
+
+def _request_shutdown(signum, frame):
+    _shutdown.set()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the RTM Server Manager without a GUI.")
+    parser.add_argument("--start", action="store_true", help="start every configured server instance")
+    args = parser.parse_args(argv)
+
+    if control_channel.is_daemon_running():
+        print(f"⚠️ A daemon is already listening on {control_channel.address()}.")
+        return 1
+    listener = control_channel.listen()
+
+    signal.signal(signal.SIGINT, _request_shutdown)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _request_shutdown)
+
+    log(f"🖥️ RTM Server Manager daemon started (PID {os.getpid()}).")
+    performance_monitor.start_monitoring(log)
+    restart_scheduler.start_watchdog(log)
+    from modules import metrics_exporter
+    metrics_exporter.start_if_enabled(log)
+    threading.Thread(target=_accept_loop, args=(listener,), daemon=True).start()
+
+    if args.start:
+        for instance in instances.list_instances():
+            if instance.server_path:
+                supervisor.submit("start", log, instance)
+
+    process = psutil.Process()
+    startup = time.time() - process.create_time()
+    log(f"✅ Ready in {startup:.2f}s ({process.memory_info().rss / 1024 ** 2:.0f} MB RSS). "
+        f"Control: {control_channel.address()}")
+
+    # Timed waits so signal handlers get to run on every platform.
+    while not _shutdown.wait(1):
+        pass
+
+    log("⏹ Daemon shutting down...")
+    restart_scheduler.stop_watchdog()
+    performance_monitor.stop_monitoring()
+    _stop_all_servers()
+    listener.close()
+    log("👋 Daemon stopped.")
+    return 0
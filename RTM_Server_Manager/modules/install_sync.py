@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import platform
+
+# Mirrors a shared SteamCMD staging install into an instance directory.
+# Files are compared by size and mtime (hashing only when those disagree on a same-size
+# file, or on a verify pass) and only changed files are replaced, each one atomically
+# via a temp name + os.replace. User configuration and Saved/ data are never touched,
+# and only files a previous sync put there are ever deleted.
+
+LINK_AUTO = "auto"
+LINK_REFLINK = "reflink"
+LINK_HARDLINK = "hardlink"  # opt-in only: the instance then shares its files' inodes with staging
+LINK_COPY = "copy"
+LINK_CLONE = "clone"  # reflink when possible, otherwise copy; never shares an inode
+
+USER_FILES = {"moriaserverconfig.ini", "moriaserverpermissions.txt", "moriaserverrules.txt"}
+EXCLUDED_DIRS = {"saved"}
+STEAMAPPS_DIR = "steamapps"
+SYNC_MANIFEST = ".rtm_sync.json"
+_TEMP_SUFFIX = ".rtmsync.tmp"
+_FICLONE = 0x40049409
+_HASH_CHUNK = 1024 * 1024
+
+
+class SyncResult:
+    def __init__(self):
+        self.linked = 0
+        self.copied = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.bytes_written = 0
+
+    def summary(self):
+        return (f"{self.linked} linked, {self.copied} copied ({self.bytes_written / 1024 ** 2:.1f} MB), "
+                f"{self.unchanged} unchanged, {self.removed} removed")
+
+
+def is_excluded(relative_path):
+    parts = relative_path.replace("\\", "/").lower().split("/")
+    if len(parts) == 1 and (parts[0] in USER_FILES or parts[0] == SYNC_MANIFEST):
+        return True
+    if EXCLUDED_DIRS.intersection(parts[:-1]):
+        return True
+    if parts[0] == STEAMAPPS_DIR:
+        # Only the app manifest is needed to read the installed build; the rest of
+        # steamapps/ is SteamCMD's own scratch space.
+        return not (len(parts) == 2 and parts[1].startswith("appmanifest_"))
+    return False
+
+def _is_excluded_dir(relative_dir):
+    parts = relative_dir.replace("\\", "/").lower().split("/")
+    return bool(EXCLUDED_DIRS.intersection(parts)) or (parts[0] == STEAMAPPS_DIR and len(parts) > 1)
+
+def default_link_mode():
+    # Never hardlink by default: a hardlinked file shares its inode with staging, so the
+    # next SteamCMD run against staging would patch a running server's binaries in place
+    # (and on Windows fail on the ones it keeps open). Reflinks are copy-on-write.
+    return LINK_COPY if platform.system() == "Windows" else LINK_CLONE
+
+def _walk(root):
+    for directory, dirs, files in os.walk(root):
+        relative_dir = os.path.relpath(directory, root)
+        if relative_dir == ".":
+            relative_dir = ""
+        dirs[:] = [d for d in dirs if not _is_excluded_dir(os.path.join(relative_dir, d))]
+        for name in files:
+            relative = os.path.join(relative_dir, name)
+            if not is_excluded(relative) and not name.endswith(_TEMP_SUFFIX):
+                yield relative
+
+def _file_hash(path):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def _same_file(source, target, source_stat, verify, shared_ok):
+    try:
+        target_stat = os.stat(target)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(source_stat, target_stat):
+        # A hardlink left by an earlier sync is only kept while hardlinks are asked for.
+        return shared_ok
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    if not verify and int(source_stat.st_mtime) == int(target_stat.st_mtime):
+        return True
+    if _file_hash(source) != _file_hash(target):
+        return False
+    # Same content, different mtime: align it so the next sync takes the fast path.
+    os.utime(target, (target_stat.st_atime, source_stat.st_mtime))
+    return True
+
+def _reflink(source, target):
+    import fcntl
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+def _place(source, target, mode):
+    # Returns the mode actually used. Reflink/clone fall back to a copy; only an explicit
+    # hardlink mode links, falling back to a copy across volumes.
+    temp = target + _TEMP_SUFFIX
+    if os.path.lexists(temp):
+        os.remove(temp)
+
+    if mode in (LINK_REFLINK, LINK_CLONE) and sys.platform.startswith("linux"):
+        try:
+            _reflink(source, temp)
+            os.replace(temp, target)
+            return LINK_REFLINK
+        except OSError:
+            if os.path.lexists(temp):
+                os.remove(temp)
+    if mode == LINK_HARDLINK:
+        try:
+            os.link(source, temp)
+            os.replace(temp, target)
+            return LINK_HARDLINK
+        except OSError:
+            # Different volume or a filesystem without hardlinks.
+            if os.path.lexists(temp):
+                os.remove(temp)
+
+    shutil.copy2(source, temp)
+    os.replace(temp, target)
+    return LINK_COPY
+
+def _read_manifest(target_root):
+    try:
+        with open(os.path.join(target_root, SYNC_MANIFEST), "r") as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+def _write_manifest(target_root, files):
+    path = os.path.join(target_root, SYNC_MANIFEST)
+    with open(path + _TEMP_SUFFIX, "w") as f:
+        json.dump(sorted(files), f)
+    os.replace(path + _TEMP_SUFFIX, path)
+
+def sync_tree(source_root, target_root, mode=LINK_AUTO, verify=False):
+    # verify=True hashes every same-size file that isn't already a link to staging.
+    if mode == LINK_AUTO:
+        mode = default_link_mode()
+    result = SyncResult()
+    os.makedirs(target_root, exist_ok=True)
+    previous = _read_manifest(target_root)
+    current = set()
+
+    for relative in _walk(source_root):
+        source = os.path.join(source_root, relative)
+        target = os.path.join(target_root, relative)
+        current.add(relative.replace("\\", "/"))
+        source_stat = os.stat(source)
+
+        if _same_file(source, target, source_stat, verify, mode == LINK_HARDLINK):
+            result.unchanged += 1
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # The app manifest is tiny and rewritten by SteamCMD, so it is never shared.
+        used = _place(source, target, LINK_COPY if relative.startswith(STEAMAPPS_DIR) else mode)
+        if used == LINK_COPY:
+            result.copied += 1
+            result.bytes_written += source_stat.st_size
+        else:
+            result.linked += 1
+
+    for relative in previous - current:
+        path = os.path.join(target_root, relative)
+        if not is_excluded(relative) and os.path.isfile(path):
+            os.remove(path)
+            result.removed += 1
+
+    _write_manifest(target_root, current)
+    return result
@@ -0,0 +1,212 @@
+import re
+import atexit
+import threading
+from collections import deque
+from modules import settings_store, metrics_store, log_sink
+from modules.logger import log_error
+
+# Registry of the RTM servers managed by this process.
+# The "default" instance keeps using the top-level settings.json keys (rtm_server_path,
+# restart_schedule, ...) so single-server setups are unchanged; additional instances
+# store the same keys under settings.json "instances" -> {id: {...}}.
+# An instance only holds state; the supervisor, scheduler and monitor each run one
+# shared thread (or a small pool) that works across every instance.
+
+DEFAULT_INSTANCE_ID = "default"
+DEFAULT_INSTANCE_NAME = "Default"
+RECENT_OUTPUT_LINES = 50
+
+
+class ServerInstance:
+    def __init__(self, instance_id, name):
+        self.id = instance_id
+        self.name = name
+
+        # server_control
+        self.process = None
+        self.reader = None
+        self.recent_output = deque(maxlen=RECENT_OUTPUT_LINES)
+        self.player_names = {}  # player id -> name, learned by output_parser
+        self.running_config = None  # MoriaServerConfig.ini values at launch, see server_config
+
+        # supervisor
+        self.state = "stopped"
+        self.stopping_process = None
+        self.commands = deque()
+        self.busy = False
+        self.crash_times = deque()
+        self.restart_timer = None
+        self.last_crash = None
+
+        # performance_monitor
+        self.monitored_proc = None
+        self.attached_to_launcher = False
+        self.last_counters = None
+        self.next_lookup = 0
+        self.last_report = 0
+
+        self._metrics = None
+        self._sink = None
+
+    @property
+    def metrics(self):
+        # Allocated on first use so idle instances cost next to nothing.
+        if self._metrics is None:
+            self._metrics = metrics_store.MetricsStore()
+        return self._metrics
+
+    @property
+    def sink(self):
+        # This server's own log stream (logs/server-<id>_*.log); the shared terminal
+        # sink keeps the combined console view.
+        with _lock:
+            if self._sink is None:
+                from modules import log_index
+                self._sink = log_sink.LogSink(f"server-{self.id}")
+                log_index.watch(self._sink)
+                atexit.register(self._sink.close)
+            return self._sink
+
+    @property
+    def server_path(self):
+        return self.get_setting("rtm_server_path")
+
+    def get_setting(self, key, default=None):
+        if self.id == DEFAULT_INSTANCE_ID:
+            return settings_store.get(key, default)
+        return settings_store.get("instances", {}).get(self.id, {}).get(key, default)
+
+    def set_setting(self, key, value):
+        if self.id == DEFAULT_INSTANCE_ID:
+            settings_store.set_value(key, value)
+            return
+        configured = settings_store.get("instances", {})
+        configured.setdefault(self.id, {})[key] = value
+        settings_store.set_value("instances", configured)
+
+    def tag(self, log):
+        # Copies output into this instance's own sink and prefixes the terminal output
+        # with the instance name once there is more than one.
+        if getattr(log, "instance_id", None) == self.id:
+            return log
+        prefix = f"[{self.name}] " if len(_instances) > 1 else ""
+        sink = self.sink
+
+        def tagged(message):
+            for line in str(message).split("\n"):
+                sink.write(line)
+            log(prefix + message)
+        tagged.instance_id = self.id
+        return tagged
+
+
+_lock = threading.RLock()
+_instances = {}
+_active_id = DEFAULT_INSTANCE_ID
+_listeners = []
+
+def _sync():
+    # Mirrors settings.json into the registry, keeping existing objects (and their
+    # running processes) for instances that are still configured.
+    global _active_id
+    configured = settings_store.get("instances", {}) or {}
+    with _lock:
+        wanted = {DEFAULT_INSTANCE_ID: settings_store.get("instance_name", DEFAULT_INSTANCE_NAME)}
+        for instance_id, config in configured.items():
+            wanted[instance_id] = config.get("name", instance_id)
+
+        for instance_id in list(_instances):
+            instance = _instances[instance_id]
+            if instance_id not in wanted and instance.process is None:
+                del _instances[instance_id]
+        for instance_id, name in wanted.items():
+            if instance_id in _instances:
+                _instances[instance_id].name = name
+            else:
+                _instances[instance_id] = ServerInstance(instance_id, name)
+
+        active = settings_store.get("active_instance", _active_id)
+        _active_id = active if active in _instances else DEFAULT_INSTANCE_ID
+
+def _notify():
+    for callback in list(_listeners):
+        try:
+            callback()
+        except Exception as e:
+            log_error(f"[instances] Listener failed: {e}")
+
+def _on_settings_changed(changed):
+    if changed & {"instances", "instance_name", "active_instance"}:
+        _sync()
+        _notify()
+
+def add_listener(callback):
+    # callback() runs whenever instances are added, removed, renamed or switched.
+    _listeners.append(callback)
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def list_instances():
+    with _lock:
+        return list(_instances.values())
+
+def get(instance_id=None):
+    with _lock:
+        return _instances.get(instance_id or _active_id)
+
+def active():
+    with _lock:
+        return _instances[_active_id]
+
+def find(name_or_id):
+    key = name_or_id.strip().lower()
+    with _lock:
+        for instance in _instances.values():
+            if instance.id == key or instance.name.lower() == key:
+                return instance
+    return None
+
+def set_active(instance_id):
+    if instance_id not in _instances:
+        raise KeyError(instance_id)
+    settings_store.set_value("active_instance", instance_id)
+
+def add_instance(name, server_path):
+    base = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "server"
+    instance_id = base
+    suffix = 2
+    with _lock:
+        while instance_id in _instances:
+            instance_id = f"{base}-{suffix}"
+            suffix += 1
+
+        instance = ServerInstance(instance_id, name)
+        _instances[instance_id] = instance
+
+    configured = settings_store.get("instances", {}) or {}
+    configured[instance_id] = {"name": name, "rtm_server_path": server_path}
+    settings_store.set_value("instances", configured)
+    return instance
+
+def remove_instance(instance_id):
+    if instance_id == DEFAULT_INSTANCE_ID:
+        raise ValueError("The default instance cannot be removed.")
+    instance = _instances.get(instance_id)
+    if instance and instance.process is not None and instance.process.poll() is None:
+        raise ValueError(f"Stop {instance.name} before removing it.")
+
+    configured = settings_store.get("instances", {}) or {}
+    configured.pop(instance_id, None)
+    updates = {"instances": configured}
+    if _active_id == instance_id:
+        updates["active_instance"] = DEFAULT_INSTANCE_ID
+    if instance:
+        instance.process = None
+        if instance._sink is not None:
+            instance._sink.close()
+    settings_store.update(updates)
+
+_sync()
+settings_store.subscribe(_on_settings_changed)
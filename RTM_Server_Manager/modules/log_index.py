@@ -0,0 +1,243 @@
+import os
+import re
+import gzip
+import json
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from modules import log_sink
+from modules.logger import log_error
+
+# On-disk search index for closed (gzipped) log segments.
+# Each segment gets a "<segment>.idx" sidecar holding the timestamp of the first line
+# and uncompressed byte offset of every BLOCK_LINES-line block, plus an inverted index
+# of word -> blocks. A search seeks straight to candidate blocks and only tokenises
+# their lines; the live, uncompressed segment is scanned directly.
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 2
+BLOCK_LINES = 256
+MAX_TOKEN_LENGTH = 48
+MAX_CACHED_INDEXES = 64
+
+_TOKEN = re.compile(r"\w+")
+
+_cache = OrderedDict()  # index path -> (mtime_ns, index), least recently used first
+_cache_lock = threading.Lock()
+_pending = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+def tokenize(text):
+    return {token for token in _TOKEN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH}
+
+def _indexable(token):
+    # Bare numbers (ports, ids, engine timestamps) would bloat the index for little gain;
+    # queries containing them are still answered, just without pruning on that term.
+    return len(token) > 1 and not token.isdigit()
+
+def format_time(value):
+    return value.strftime(log_sink.TIMESTAMP_FORMAT) if isinstance(value, datetime) else value
+
+def _open_binary(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+def _decode(raw):
+    return log_sink.parse_line(raw.decode("utf-8", "replace").rstrip("\n"))
+
+def build_index(path):
+    tokens = {}
+    times = []
+    offsets = []
+    last = None
+    count = 0
+    position = 0
+    with _open_binary(path) as f:
+        for number, raw in enumerate(f):
+            stamp, message = _decode(raw)
+            block = number // BLOCK_LINES
+            if number % BLOCK_LINES == 0:
+                times.append(stamp)
+                offsets.append(position)
+            position += len(raw)
+            last = stamp
+            for token in tokenize(message):
+                if _indexable(token):
+                    blocks = tokens.setdefault(token, [])
+                    if not blocks or blocks[-1] != block:
+                        blocks.append(block)
+            count = number + 1
+
+    index = {
+        "version": INDEX_VERSION,
+        "lines": count,
+        "first": times[0] if times else None,
+        "last": last,
+        "times": times,
+        "offsets": offsets,
+        "tokens": tokens,
+    }
+    index_path = path + INDEX_SUFFIX
+    temp_path = index_path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(temp_path, index_path)
+    return index
+
+def load_index(path):
+    # Returns the index for a closed segment, building it if missing or stale.
+    index_path = path + INDEX_SUFFIX
+    try:
+        segment_mtime = os.stat(path).st_mtime_ns
+        try:
+            mtime = os.stat(index_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        with _cache_lock:
+            cached = _cache.get(index_path)
+            if cached:
+                _cache.move_to_end(index_path)
+        if cached and mtime is not None and cached[0] == mtime:
+            return cached[1]
+
+        index = None
+        if mtime is not None and mtime >= segment_mtime:
+            with gzip.open(index_path, "rt", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION:
+                index = None
+        if index is None:
+            index = build_index(path)
+            mtime = os.stat(index_path).st_mtime_ns
+
+        with _cache_lock:
+            _cache[index_path] = (mtime, index)
+            _cache.move_to_end(index_path)
+            while len(_cache) > MAX_CACHED_INDEXES:
+                _cache.popitem(last=False)
+        return index
+    except (OSError, ValueError) as e:
+        log_error(f"[log_index] Failed to index {path}: {e}")
+        return None
+
+def _candidate_blocks(index, terms, start, end):
+    block_count = len(index["times"])
+    blocks = set(range(block_count))
+    for term in terms:
+        if _indexable(term):
+            blocks &= set(index["tokens"].get(term, ()))
+            if not blocks:
+                return blocks
+
+    times = index["times"]
+    if start:
+        # A block can hold matches only if the next block starts at or after `start`.
+        blocks = {b for b in blocks if b + 1 >= block_count or times[b + 1] >= start}
+    if end:
+        blocks = {b for b in blocks if times[b] <= end}
+    return blocks
+
+def _match(stamp, message, terms, start, end):
+    if start and stamp < start:
+        return False
+    if end and stamp > end:
+        return False
+    return not terms or terms <= tokenize(message)
+
+def _scan(path, terms, start, end):
+    with log_sink.open_segment(path) as f:
+        for line in f:
+            stamp, message = log_sink.parse_line(line.rstrip("\n"))
+            if _match(stamp, message, terms, start, end):
+                yield stamp, message
+
+def _scan_blocks(path, index, blocks, terms, start, end):
+    # Seeking a gzip stream still inflates the skipped bytes, but in C and without
+    # splitting them into lines, which is where the time would otherwise go.
+    with _open_binary(path) as f:
+        for block in sorted(blocks):
+            f.seek(index["offsets"][block])
+            for _ in range(BLOCK_LINES):
+                raw = f.readline()
+                if not raw:
+                    break
+                stamp, message = _decode(raw)
+                if end and stamp > end:
+                    return
+                if _match(stamp, message, terms, start, end):
+                    yield stamp, message
+
+def search(query="", start=None, end=None, sink=None):
+    # Lazily yields (timestamp, message) for lines containing every word of `query`
+    # (case-insensitive) within [start, end], oldest first.
+    sink = sink or log_sink.terminal
+    terms = tokenize(query)
+    start = format_time(start)
+    end = format_time(end)
+
+    for path in sink.segments():
+        index = load_index(path) if path.endswith(".gz") else None
+        try:
+            if index is None:
+                yield from _scan(path, terms, start, end)
+                continue
+            if not index["lines"]:
+                continue
+            if (start and index["last"] < start) or (end and index["first"] > end):
+                continue
+            blocks = _candidate_blocks(index, terms, start, end)
+            if blocks:
+                yield from _scan_blocks(path, index, blocks, terms, start, end)
+        except (OSError, EOFError) as e:
+            # Retention may delete a segment between listing and reading it.
+            log_error(f"[log_index] Failed to search {path}: {e}")
+
+def _prune(sink):
+    if not os.path.isdir(sink.directory):
+        return
+    segments = set(sink.segments())
+    for name in os.listdir(sink.directory):
+        index_path = os.path.join(sink.directory, name)
+        if name.endswith(INDEX_SUFFIX) and index_path[:-len(INDEX_SUFFIX)] not in segments:
+            try:
+                os.remove(index_path)
+            except OSError:
+                pass
+            with _cache_lock:
+                _cache.pop(index_path, None)
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_worker_loop, name="log-index", daemon=True)
+        _worker.start()
+
+def _worker_loop():
+    while True:
+        sink, path = _pending.get()
+        if path is None:
+            _prune(sink)
+        elif os.path.exists(path):
+            load_index(path)
+
+def index_sink(sink):
+    # Queues every closed segment of `sink` that lacks an up-to-date index.
+    _ensure_worker()
+    _pending.put((sink, None))
+    for path in sink.segments():
+        if path.endswith(".gz"):
+            _pending.put((sink, path))
+
+def watch(sink):
+    def on_segment_closed(path):
+        _ensure_worker()
+        _pending.put((sink, path))
+        _pending.put((sink, None))
+    sink.segment_listeners.append(on_segment_closed)
+
+watch(log_sink.terminal)
+watch(log_sink.errors)
@@ -0,0 +1,300 @@
+import os
+import sys
+import atexit
+import gzip
+import glob
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+LOGS_DIR = os.path.join(BASE_DIR, "logs")
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 2        # rotate when a segment reaches 10 MB
+DEFAULT_ROTATE_SECONDS = 24 * 3600        # ...or is a day old
+DEFAULT_RETENTION_BYTES = 500 * 1024 ** 2  # total disk budget per sink
+FLUSH_INTERVAL = 0.5
+_INDEX_STEP = 256
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+OWNER_SUFFIX = ".owner"  # next to an open segment; holds the writing process's PID
+
+def format_line(message, timestamp=None):
+    timestamp = timestamp or datetime.now()
+    return f"{timestamp.strftime(TIMESTAMP_FORMAT)} {message}"
+
+def parse_line(line):
+    # Returns (timestamp string, message) for a line written by format_line.
+    return line[:19], line[20:]
+
+def open_segment(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+class _Segment:
+    def __init__(self, path, first_line):
+        self.path = path
+        self.first_line = first_line
+        self.line_count = 0
+        self.flushed = 0   # lines already handed to the OS, safe to read back without waiting
+        self.offsets = []  # byte offset of every _INDEX_STEP-th line while uncompressed
+
+
+class LogSink:
+    # Queue-fed log writer. Callers never touch the disk: a single background thread
+    # batches lines, rotates segments by size and age, gzips closed segments and keeps
+    # the sink's total disk use under a retention cap.
+
+    def __init__(self, name, directory=LOGS_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 rotate_seconds=DEFAULT_ROTATE_SECONDS, retention_bytes=DEFAULT_RETENTION_BYTES):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.retention_bytes = retention_bytes
+        self.lines_written = 0
+        self.segment_listeners = []  # callback(path) after a segment is closed and compressed
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._segments = []
+        self._segments_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._opened_at = 0
+
+    def write(self, message, timestamp=None):
+        self._ensure_thread()
+        self._queue.put(format_line(message, timestamp))
+
+    def flush(self, timeout=5):
+        self._ensure_thread()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def segments(self):
+        # All segment files for this sink on disk, oldest first.
+        files = glob.glob(os.path.join(self.directory, f"{glob.escape(self.name)}_*.log*"))
+        files = [path for path in files if path.endswith((".log", ".log.gz"))]
+        return sorted(files, key=self._segment_order)
+
+    def _segment_order(self, path):
+        # name_<stamp>.log, then name_<stamp>_<n>.log for segments opened in the same
+        # second; n is compared as a number so _10 sorts after _2.
+        stem = os.path.basename(path)[len(self.name) + 1:].split(".log")[0]
+        parts = stem.split("_")
+        stamp = "_".join(parts[:2])
+        suffix = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+        return stamp, suffix
+
+    def read_lines(self, start, end, wait=True):
+        # Lines [start, end) written by this sink during the current session. wait=False
+        # never blocks on the writer thread (which may be busy gzipping a segment); it
+        # only returns lines already on disk.
+        if wait:
+            self.flush()
+        with self._segments_lock:
+            segments = [s for s in self._segments if s.first_line < end and s.first_line + s.flushed > start]
+            segments = [(s.path, s.first_line, s.flushed, list(s.offsets)) for s in segments]
+
+        lines = []
+        for path, first_line, flushed, offsets in segments:
+            skip = max(0, start - first_line)
+            wanted = min(end, first_line + flushed) - max(start, first_line)
+            try:
+                if offsets and not path.endswith(".gz"):
+                    with open(path, "rb") as f:
+                        f.seek(offsets[skip // _INDEX_STEP])
+                        for _ in range(skip % _INDEX_STEP):
+                            f.readline()
+                        for _ in range(wanted):
+                            lines.append(f.readline().decode("utf-8", "replace").rstrip("\n"))
+                else:
+                    with open_segment(path) as f:
+                        for index, line in enumerate(f):
+                            if index >= skip + wanted:
+                                break
+                            if index >= skip:
+                                lines.append(line.rstrip("\n"))
+            except OSError as e:
+                print(f"[log_sink] Failed to read {path}: {e}", file=sys.stderr)
+        return lines
+
+    def close(self):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"log-sink-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        self._compress_leftovers()
+        while True:
+            try:
+                items = [self._queue.get(timeout=FLUSH_INTERVAL)]
+            except queue.Empty:
+                if self._file is not None and time.time() - self._opened_at >= self.rotate_seconds:
+                    self._close_segment()
+                continue
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch = [item for item in items if isinstance(item, str)]
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    print(f"[log_sink] Failed to write {self.name} log: {e}", file=sys.stderr)
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in items:
+                self._close_segment()
+                return
+
+    def _compress_leftovers(self):
+        # Segments left uncompressed by an earlier session that exited mid-write. The GUI
+        # and the headless daemon share LOGS_DIR, so a segment another live manager is
+        # still writing is left alone.
+        for path in self.segments():
+            if path.endswith(".log") and not _owned_by_live_process(path):
+                self._compress(path)
+                _remove_owner(path)
+
+    def _compress(self, path, keep_source=False):
+        compressed = path + ".gz"
+        try:
+            with open(path, "rb") as src, gzip.open(compressed, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            if not keep_source:
+                os.remove(path)
+            return compressed
+        except OSError as e:
+            print(f"[log_sink] Failed to compress {path}: {e}", file=sys.stderr)
+            return path
+
+    def _write_batch(self, lines):
+        chunks = []
+        for line in lines:
+            if self._file is None:
+                self._open_segment()
+            segment = self._segments[-1]
+            if segment.line_count % _INDEX_STEP == 0:
+                segment.offsets.append(self._size)
+            data = (line + "\n").encode("utf-8", "replace")
+            chunks.append(data)
+            self._size += len(data)
+            segment.line_count += 1
+            self.lines_written += 1
+            if self._size >= self.max_bytes:
+                self._file.write(b"".join(chunks))
+                chunks = []
+                with self._segments_lock:
+                    segment.flushed = segment.line_count
+                self._close_segment()
+
+        if chunks:
+            self._file.write(b"".join(chunks))
+            self._file.flush()
+            with self._segments_lock:
+                self._segments[-1].flushed = self._segments[-1].line_count
+            if time.time() - self._opened_at >= self.rotate_seconds:
+                self._close_segment()
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.join(self.directory, f"{self.name}_{stamp}.log")
+        suffix = 1
+        while os.path.exists(path) or os.path.exists(path + ".gz"):
+            path = os.path.join(self.directory, f"{self.name}_{stamp}_{suffix}.log")
+            suffix += 1
+        self._file = open(path, "ab")
+        try:
+            with open(path + OWNER_SUFFIX, "w") as f:
+                f.write(str(os.getpid()))
+        except OSError as e:
+            print(f"[log_sink] Failed to mark {path} as in use: {e}", file=sys.stderr)
+        self._size = 0
+        self._opened_at = time.time()
+        with self._segments_lock:
+            self._segments.append(_Segment(path, self.lines_written))
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        segment = self._segments[-1]
+        # The plain file is only removed once readers have been pointed at the .gz.
+        compressed = self._compress(segment.path, keep_source=True)
+        _remove_owner(segment.path)
+        with self._segments_lock:
+            source, segment.path = segment.path, compressed
+            segment.offsets = []
+        if compressed != source:
+            try:
+                os.remove(source)
+            except OSError as e:
+                print(f"[log_sink] Failed to remove {source}: {e}", file=sys.stderr)
+
+        for callback in list(self.segment_listeners):
+            try:
+                callback(segment.path)
+            except Exception as e:
+                print(f"[log_sink] Segment listener failed: {e}", file=sys.stderr)
+        self._apply_retention()
+
+    def _apply_retention(self):
+        files = [(path, os.path.getsize(path)) for path in self.segments() if os.path.exists(path)]
+        total = sum(size for _, size in files)
+        for path, size in files:
+            if total <= self.retention_bytes:
+                break
+            if self._file is not None and path == self._segments[-1].path or _owned_by_live_process(path):
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def _owned_by_live_process(path):
+    try:
+        with open(path + OWNER_SUFFIX) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return False
+    import psutil
+    return psutil.pid_exists(pid)
+
+def _remove_owner(path):
+    try:
+        os.remove(path + OWNER_SUFFIX)
+    except OSError:
+        pass
+
+
+terminal = LogSink("terminal")
+errors = LogSink("errors")
+
+atexit.register(terminal.close)
+atexit.register(errors.close)
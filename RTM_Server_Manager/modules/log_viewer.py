@@ -0,0 +1,154 @@
+import time
+import threading
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel,
+    QPlainTextEdit, QComboBox, QCheckBox, QDateTimeEdit
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import QObject, QDateTime, pyqtSignal
+from modules import log_sink, log_index, instances
+
+PAGE_SIZE = 200
+
+SOURCES = (
+    ("Terminal / server output", log_sink.terminal),
+    ("Errors", log_sink.errors),
+)
+
+def _sources():
+    return list(SOURCES) + [(f"Server: {instance.name}", instance.sink) for instance in instances.list_instances()]
+
+
+class _PageBridge(QObject):
+    # Carries result pages from the search thread back to the GUI thread.
+    page_ready = pyqtSignal(int, list, bool, float)
+    sources_changed = pyqtSignal()
+
+
+class LogViewer(QWidget):
+    # Searches every rotated segment through log_index and shows results page by page;
+    # the next page is fetched when the view is scrolled to the bottom.
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+
+        controls = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Player name, error text, ... (all words must match)")
+        self.query_input.returnPressed.connect(self.start_search)
+        self.source_box = QComboBox()
+        self.sources = []
+        search_btn = QPushButton("Search")
+        search_btn.clicked.connect(self.start_search)
+        controls.addWidget(self.query_input, 1)
+        controls.addWidget(self.source_box)
+        controls.addWidget(search_btn)
+
+        range_row = QHBoxLayout()
+        self.from_check = QCheckBox("From")
+        self.from_edit = QDateTimeEdit(QDateTime.currentDateTime().addDays(-1))
+        self.to_check = QCheckBox("To")
+        self.to_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        for edit in (self.from_edit, self.to_edit):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            edit.setCalendarPopup(True)
+        range_row.addWidget(self.from_check)
+        range_row.addWidget(self.from_edit)
+        range_row.addWidget(self.to_check)
+        range_row.addWidget(self.to_edit)
+        range_row.addStretch()
+
+        self.results = QPlainTextEdit()
+        self.results.setReadOnly(True)
+        self.results.setFont(QFont("Courier New", 10))
+        self.results.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+        footer = QHBoxLayout()
+        self.status_label = QLabel()
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setEnabled(False)
+        self.more_btn.clicked.connect(self.fetch_page)
+        footer.addWidget(self.status_label, 1)
+        footer.addWidget(self.more_btn)
+
+        layout.addLayout(controls)
+        layout.addLayout(range_row)
+        layout.addWidget(self.results)
+        layout.addLayout(footer)
+        self.setLayout(layout)
+
+        self.bridge = _PageBridge()
+        self.bridge.page_ready.connect(self._on_page)
+        self.bridge.sources_changed.connect(self._load_sources)
+        self._results = None
+        self._generation = 0
+        self._fetching = False
+        self._count = 0
+        self._elapsed = 0.0
+
+        self._load_sources()
+        instances.add_listener(self.bridge.sources_changed.emit)
+
+    def _load_sources(self):
+        current = self.source_box.currentText()
+        self.sources = _sources()
+        self.source_box.clear()
+        for title, sink in self.sources:
+            self.source_box.addItem(title)
+            log_index.index_sink(sink)
+        index = self.source_box.findText(current)
+        self.source_box.setCurrentIndex(max(index, 0))
+
+    def start_search(self):
+        _, sink = self.sources[self.source_box.currentIndex()]
+        start = self.from_edit.dateTime().toPyDateTime() if self.from_check.isChecked() else None
+        end = self.to_edit.dateTime().toPyDateTime() if self.to_check.isChecked() else None
+
+        self._generation += 1
+        self._results = log_index.search(self.query_input.text(), start, end, sink)
+        self._fetching = False
+        self._count = 0
+        self._elapsed = 0.0
+        self.results.clear()
+        self.fetch_page()
+
+    def fetch_page(self):
+        if self._results is None or self._fetching:
+            return
+        self._fetching = True
+        self.more_btn.setEnabled(False)
+        self.status_label.setText(f"Searching... {self._count} results so far")
+        threading.Thread(
+            target=self._read_page, args=(self._generation, self._results), daemon=True
+        ).start()
+
+    def _read_page(self, generation, results):
+        started = time.perf_counter()
+        page = []
+        done = False
+        for stamp, message in results:
+            page.append(f"[{stamp.replace('T', ' ')}] {message}")
+            if len(page) >= PAGE_SIZE:
+                break
+        else:
+            done = True
+        self.bridge.page_ready.emit(generation, page, done, time.perf_counter() - started)
+
+    def _on_page(self, generation, page, done, elapsed):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self._count += len(page)
+        self._elapsed += elapsed
+        if page:
+            self.results.appendPlainText("\n".join(page))
+        if done:
+            self._results = None
+        self.more_btn.setEnabled(not done)
+        suffix = "" if done else " (more available)"
+        self.status_label.setText(f"{self._count} results in {self._elapsed * 1000:.0f} ms{suffix}")
+
+    def _on_scroll(self, value):
+        if value and value == self.results.verticalScrollBar().maximum():
+            self.fetch_page()
@@ -1,22 +1,11 @@
-import sys
-import os
-from datetime import datetime
+from modules import log_sink
 
-if getattr(sys, 'frozen', False):
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-LOGS_DIR = os.path.join(BASE_DIR, "logs")
-
-os.makedirs(LOGS_DIR, exist_ok=True)
-
-timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-LOG_FILE_PATH = os.path.join(LOGS_DIR, f"{timestamp}.log")
+LOGS_DIR = log_sink.LOGS_DIR
 
 def log_error(message):
+    # Queued to the errors sink; the write, rotation and compression happen off-thread.
     try:
-        with open(LOG_FILE_PATH, "a") as f:
-            f.write(f"[{datetime.now().isoformat()}] {message}\n")
+        for line in str(message).split("\n"):
+            log_sink.errors.write(line)
     except Exception:
-        pass
\ No newline at end of file
+        pass
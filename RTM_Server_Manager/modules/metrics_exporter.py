@@ -0,0 +1,134 @@
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from modules import runtime_stats, restart_scheduler, settings_store, instances
+from modules.logger import log_error
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9877
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# metrics_store sample key -> (metric name, help, multiplier)
+_SAMPLE_METRICS = {
+    "cpu": ("rtm_server_cpu_percent", "Server process CPU usage in percent.", 1),
+    "rss_mb": ("rtm_server_memory_rss_bytes", "Server process resident memory.", 1024 ** 2),
+    "threads": ("rtm_server_threads", "Server process thread count.", 1),
+    "handles": ("rtm_server_handles", "Server process open handles or file descriptors.", 1),
+    "disk_kbps": ("rtm_server_disk_io_bytes_per_second", "Server process disk read+write rate.", 1024),
+    "net_kbps": ("rtm_host_network_bytes_per_second", "Host network send+receive rate.", 1024),
+}
+
+_server = None
+_thread = None
+
+def render():
+    # Builds the exposition text purely from in-memory snapshots; no psutil calls here.
+    # Per-server series carry server (instance id) and name labels; "instance" is left to
+    # Prometheus, which sets it to the scrape target.
+    now = time.time()
+    families = {}  # name -> (kind, help, [(labels, value)]), in first-seen order
+
+    def metric(name, kind, help_text, value, instance=None):
+        if value is None:
+            return
+        labels = f'{{server="{_escape(instance.id)}",name="{_escape(instance.name)}"}}' if instance else ""
+        families.setdefault(name, (kind, help_text, []))[2].append((labels, value))
+
+    manager = runtime_stats.snapshot()
+    metric("rtm_manager_uptime_seconds", "gauge", "Seconds since the manager started.", now - manager["manager_started_at"])
+    metric("rtm_steamcmd_last_update_duration_seconds", "gauge", "Duration of the last SteamCMD update.", manager["last_update_seconds"])
+
+    for instance in instances.list_instances():
+        stats = runtime_stats.snapshot(instance.id)
+        started = stats["server_started_at"]
+        metric("rtm_server_up", "gauge", "1 if the managed server process is running.", 1 if started else 0, instance)
+        metric("rtm_server_uptime_seconds", "gauge", "Seconds since the server process was launched.", now - started if started else 0, instance)
+        metric("rtm_server_restarts_total", "counter", "Restarts performed by the manager.", stats["restarts"], instance)
+        metric("rtm_server_crashes_total", "counter", "Unexpected server exits.", stats["crashes"], instance)
+        metric("rtm_server_last_shutdown_duration_seconds", "gauge", "Duration of the last stop, from Exit to confirmed exit.", stats["last_shutdown_seconds"], instance)
+        metric("rtm_server_forced_stops_total", "counter", "Stops that needed terminate or kill.", stats["forced_stops"], instance)
+        metric("rtm_server_players_online", "gauge", "Players connected, parsed from server output.", stats["players_online"], instance)
+
+        next_restart = restart_scheduler.get_scheduled_restart(instance)
+        if next_restart:
+            metric("rtm_scheduler_next_restart_timestamp_seconds", "gauge", "Unix time of the next scheduled restart.", next_restart.timestamp(), instance)
+
+        latest = instance.metrics.latest() if started else None
+        if latest:
+            timestamp, sample = latest
+            metric("rtm_server_sample_timestamp_seconds", "gauge", "Unix time of the last performance sample.", timestamp, instance)
+            for key, (name, help_text, scale) in _SAMPLE_METRICS.items():
+                if key in sample:
+                    metric(name, "gauge", help_text, sample[key] * scale, instance)
+
+    lines = []
+    for name, (kind, help_text, series) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            lines.append(f"{name}{labels} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporter(log):
+    global _server, _thread
+    if _server:
+        log("📈 Metrics exporter already running.")
+        return
+
+    config = settings_store.get("metrics_exporter", {})
+    host = config.get("host", DEFAULT_HOST)
+    port = int(config.get("port", DEFAULT_PORT))
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+    except Exception as e:
+        _server = None
+        log_error(f"[metrics_exporter] Failed to bind {host}:{port}: {e}")
+        log(f"❌ Metrics exporter failed to start on {host}:{port}: {e}")
+        return
+
+    _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    _thread.start()
+    log(f"📈 Metrics exporter serving http://{host}:{port}/metrics")
+
+def stop_exporter():
+    global _server, _thread
+    if _server:
+        _server.shutdown()
+        _server.server_close()
+    _server = None
+    _thread = None
+
+def set_enabled(enabled, log):
+    config = settings_store.get("metrics_exporter", {})
+    config["enabled"] = enabled
+    settings_store.set_value("metrics_exporter", config)
+    if enabled:
+        start_exporter(log)
+    else:
+        stop_exporter()
+        log("❌ Metrics exporter stopped.")
+
+def start_if_enabled(log):
+    if settings_store.get("metrics_exporter", {}).get("enabled", False):
+        start_exporter(log)
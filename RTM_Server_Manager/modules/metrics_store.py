@@ -0,0 +1,140 @@
+import time
+import array
+import threading
+
+# Time-series history for server metrics.
+# Raw samples live in a fixed-size ring; every sample is also folded into minute and
+# hour buckets, each kept in its own bounded ring, so memory use never grows.
+
+RESOLUTION_RAW = "raw"
+RESOLUTION_MINUTE = "minute"
+RESOLUTION_HOUR = "hour"
+
+# (name, bucket seconds, retained buckets)
+DEFAULT_TIERS = (
+    (RESOLUTION_RAW, 1, 3600),              # 1 hour of per-second samples
+    (RESOLUTION_MINUTE, 60, 7 * 24 * 60),   # 7 days of minutes
+    (RESOLUTION_HOUR, 3600, 90 * 24),       # 90 days of hours
+)
+
+
+class _Tier:
+    def __init__(self, name, period, capacity):
+        self.name = name
+        self.period = period
+        self.capacity = capacity
+        self.times = array.array("d", bytes(8 * capacity))
+        self.columns = {}   # metric -> (avg, min, max) arrays
+        self.head = 0       # next write slot
+        self.count = 0
+        self._bucket = None
+        self._pending = {}  # metric -> [sum, min, max, n]
+
+    def _column(self, metric):
+        if metric not in self.columns:
+            self.columns[metric] = tuple(array.array("d", [float("nan")]) * self.capacity for _ in range(3))
+        return self.columns[metric]
+
+    def add(self, timestamp, sample):
+        bucket = int(timestamp // self.period)
+        if self._bucket is not None and bucket != self._bucket:
+            self._flush()
+        self._bucket = bucket
+
+        for metric, value in sample.items():
+            acc = self._pending.get(metric)
+            if acc is None:
+                self._pending[metric] = [value, value, value, 1]
+            else:
+                acc[0] += value
+                acc[1] = min(acc[1], value)
+                acc[2] = max(acc[2], value)
+                acc[3] += 1
+
+        if self.period == 1:
+            # Raw tier: nothing to aggregate, store immediately.
+            self._flush()
+
+    def _flush(self):
+        if self._bucket is None or not self._pending:
+            return
+        slot = self.head
+        self.times[slot] = self._bucket * self.period
+        for metric in set(self.columns) | set(self._pending):
+            avg, low, high = self._column(metric)
+            acc = self._pending.get(metric)
+            if acc is None:
+                avg[slot] = low[slot] = high[slot] = float("nan")
+            else:
+                avg[slot], low[slot], high[slot] = acc[0] / acc[3], acc[1], acc[2]
+        self._pending = {}
+        self._bucket = None
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def oldest(self):
+        if not self.count:
+            return None
+        return self.times[(self.head - self.count) % self.capacity]
+
+    def query(self, metric, start, end):
+        if metric not in self.columns:
+            return []
+        avg, low, high = self.columns[metric]
+        rows = []
+        for i in range(self.count):
+            slot = (self.head - self.count + i) % self.capacity
+            ts = self.times[slot]
+            if ts < start or ts > end or avg[slot] != avg[slot]:  # skip NaN gaps
+                continue
+            rows.append((ts, avg[slot], low[slot], high[slot]))
+        return rows
+
+
+class MetricsStore:
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self._tiers = [_Tier(*tier) for tier in tiers]
+        self._lock = threading.Lock()
+        self._latest = None
+
+    def record(self, sample, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        values = {k: float(v) for k, v in sample.items() if v is not None}
+        with self._lock:
+            for tier in self._tiers:
+                tier.add(timestamp, values)
+            self._latest = (timestamp, values)
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._tiers[0].columns)
+
+    def query(self, metric, start=None, end=None, resolution=None):
+        # Returns [(timestamp, avg, min, max), ...] oldest first.
+        # Without an explicit resolution the finest tier that still covers start is used.
+        end = time.time() if end is None else end
+        start = 0 if start is None else start
+        with self._lock:
+            tier = self._pick_tier(start, resolution)
+            return tier.query(metric, start, end)
+
+    def _pick_tier(self, start, resolution):
+        if resolution:
+            for tier in self._tiers:
+                if tier.name == resolution:
+                    return tier
+            raise ValueError(f"Unknown resolution: {resolution}")
+        filled = [tier for tier in self._tiers if tier.count]
+        if not filled:
+            return self._tiers[0]
+        # Buckets align differently per tier, so allow one coarse bucket of slack.
+        cutoff = max(start, min(tier.oldest() for tier in filled) + self._tiers[-1].period)
+        for tier in filled:
+            if tier.oldest() <= cutoff:
+                return tier
+        return filled[-1]
+
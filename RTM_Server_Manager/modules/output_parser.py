@@ -0,0 +1,105 @@
+import re
+import threading
+from modules import event_bus, settings_store
+from modules.logger import log_error
+
+# Turns raw server stdout lines into event_bus events.
+# All patterns are compiled into one unanchored prefilter and one anchored alternation:
+# every line costs one prefilter search, and only lines it hits pay for the anchored
+# match that picks the event, no matter how many consumers care. Earlier entries win.
+
+DEFAULT_PATTERNS = (
+    (event_bus.PLAYER_LOGIN, r"Login request: .*?\?Name=(?P<name>[^?\s]+).*?userId: (?P<id>\S+)"),
+    (event_bus.PLAYER_JOINED, r"Join succeeded: (?P<name>.+?)\s*$"),
+    (event_bus.PLAYER_LEFT, r"UNetConnection::Close: .*?UniqueId: (?P<id>[^,\s]+)"),
+    (event_bus.SERVER_FATAL, r"Fatal error|Unhandled Exception|=== Critical error: ===|Assertion failed"),
+    (event_bus.SERVER_ERROR, r"\bError: (?P<message>.+)"),
+    (event_bus.WORLD_SAVED, r"(?i:\b(?:world|game) saved\b|\bsave (?:complete|completed|finished)\b)"),
+    (event_bus.SERVER_SHUTDOWN, r"LogExit: Exiting|Engine exit requested|(?i:shutdown complete)"),
+    (event_bus.SERVER_READY, r"IpNetDriver listening on port (?P<port>\d+)|(?i:session (?:created|hosted))"),
+)
+
+_GROUP_NAME = re.compile(r"\(\?P<(\w+)>")
+
+
+class OutputParser:
+    def __init__(self, patterns=DEFAULT_PATTERNS):
+        self.kinds = {}
+        alternatives = []
+        for index, (kind, pattern) in enumerate(patterns):
+            tag = f"p{index}"
+            inner = _GROUP_NAME.sub(lambda m: f"(?P<{tag}__{m.group(1)}>", pattern)
+            alternatives.append(f"(?P<{tag}>.*?(?:{inner}))")
+            self.kinds[tag] = kind
+        # Unanchored search rejects the (vast majority of) uninteresting lines cheaply;
+        # only hits pay for the anchored, priority-ordered match.
+        self.prefilter = re.compile("|".join(f"(?:{_GROUP_NAME.sub('(?:', p)})" for _, p in patterns))
+        self.regex = re.compile("|".join(alternatives))
+        self.names = {}  # player id -> name, learned from login lines
+        self._lock = threading.Lock()
+
+    def parse(self, line, names=None):
+        # names: the player id -> name map to learn into; each server instance has its own.
+        names = self.names if names is None else names
+        if not self.prefilter.search(line):
+            return None
+        match = self.regex.match(line)
+        if not match:
+            return None
+
+        tag = match.lastgroup
+        prefix = f"{tag}__"
+        data = {
+            key[len(prefix):]: value
+            for key, value in match.groupdict().items()
+            if value is not None and key.startswith(prefix)
+        }
+        kind = self.kinds[tag]
+
+        with self._lock:
+            if kind == event_bus.PLAYER_LOGIN and "id" in data:
+                names[data["id"]] = data.get("name")
+            elif kind == event_bus.PLAYER_LEFT and "id" in data:
+                data.setdefault("name", names.pop(data["id"], None))
+        return kind, data
+
+    def reset(self):
+        with self._lock:
+            self.names.clear()
+
+
+_parser = None
+_parser_lock = threading.Lock()
+
+def _load_patterns():
+    # settings.json "output_patterns" may override or add {kind: regex} entries.
+    overrides = settings_store.get("output_patterns", {}) or {}
+    patterns = [(kind, overrides.pop(kind, pattern)) for kind, pattern in DEFAULT_PATTERNS]
+    patterns.extend(overrides.items())
+    return patterns
+
+def get_parser():
+    global _parser
+    with _parser_lock:
+        if _parser is None:
+            try:
+                _parser = OutputParser(_load_patterns())
+            except re.error as e:
+                log_error(f"[output_parser] Invalid output_patterns in settings.json, using defaults: {e}")
+                _parser = OutputParser()
+        return _parser
+
+def feed(line, instance=None):
+    result = get_parser().parse(line, instance.player_names if instance else None)
+    if result:
+        kind, data = result
+        if instance:
+            data["instance"] = instance.id
+        return event_bus.publish(kind, data, line)
+    return None
+
+def reset(instance=None):
+    if instance:
+        instance.player_names.clear()
+    else:
+        get_parser().reset()
@@ -1,10 +1,14 @@
 import threading
 import time
 import psutil
+from modules import server_control, instances
+from modules.logger import log_error
 
 _pid_check_interval = 30
+_sample_interval = 1
 _perf_thread = None
 _stop_flag = False
+_SHIPPING_NAME = "MoriaServer-Win64-Shipping"
 
 def start_monitoring(log):
     global _perf_thread, _stop_flag
@@ -22,25 +26,147 @@ def stop_monitoring():
     global _stop_flag
     _stop_flag = True
 
+def log_history(log, instance=None):
+    instance = instance or instances.active()
+    store = instance.metrics
+    latest = store.latest()
+    if not latest:
+        log("📊 No performance samples recorded yet.")
+        return
+
+    now = time.time()
+    for label, seconds in (("1h", 3600), ("24h", 86400), ("7d", 7 * 86400)):
+        cpu = store.query("cpu", start=now - seconds)
+        mem = store.query("rss_mb", start=now - seconds)
+        if not cpu or not mem:
+            continue
+        cpu_avg = sum(row[1] for row in cpu) / len(cpu)
+        mem_first, mem_last = mem[0][1], mem[-1][1]
+        mem_peak = max(row[3] for row in mem)
+        log(f"📊 {label:>3} | CPU avg {cpu_avg:.1f}% | MEM {mem_first:.1f} → {mem_last:.1f} MB (peak {mem_peak:.1f} MB)")
+
 def _monitor_loop(log):
+    # One loop samples every instance; a lookup for a missing process is retried at
+    # most every _pid_check_interval seconds per instance.
     while not _stop_flag:
-        server_proc = _find_server_process()
-        if not server_proc:
-            time.sleep(_pid_check_interval)
-            continue
+        for instance in instances.list_instances():
+            try:
+                _sample_instance(instance, instance.tag(log))
+            except Exception as e:
+                log_error(f"[performance_monitor] Sampling {instance.name} failed: {e}")
+        time.sleep(_sample_interval)
 
-        try:
-            cpu = server_proc.cpu_percent(interval=None)
-            mem = server_proc.memory_info().rss / (1024 ** 2)  # in MB
-            log(f"📊 RTM Server | PID: {server_proc.pid} | CPU: {cpu:.1f}% | MEM: {mem:.1f} MB")
-        except Exception as e:
+def _sample_instance(instance, log):
+    now = time.monotonic()
+    known = instance.monitored_proc
+    if known is None and now < instance.next_lookup and not server_control.is_server_running(instance):
+        return
+    server_proc = _find_server_process(instance)
+    if not server_proc:
+        instance.next_lookup = now + _pid_check_interval
+        return
+    if server_proc is not known:
+        # A freshly attached handle needs one interval before cpu_percent is meaningful.
+        return
+
+    report = now - instance.last_report >= _pid_check_interval
+    try:
+        sample = _read_sample(instance, server_proc)
+        instance.metrics.record(sample)
+        if report:
+            log(f"📊 RTM Server | PID: {server_proc.pid} | CPU: {sample['cpu']:.1f}% | MEM: {sample['rss_mb']:.1f} MB")
+    except Exception as e:
+        if report:
             log(f"⚠️ Failed to read server stats: {e}")
+    if report:
+        instance.last_report = now
+
+def _read_sample(instance, server_proc):
+    with server_proc.oneshot():
+        sample = {
+            "cpu": server_proc.cpu_percent(interval=None),
+            "rss_mb": server_proc.memory_info().rss / (1024 ** 2),
+            "threads": server_proc.num_threads(),
+            "handles": server_proc.num_handles() if hasattr(server_proc, "num_handles") else server_proc.num_fds(),
+        }
+        try:
+            io = server_proc.io_counters()
+            disk_bytes = io.read_bytes + io.write_bytes
+        except (psutil.AccessDenied, AttributeError):
+            disk_bytes = None
+
+    # psutil has no per-process network counters, so this is host-wide traffic.
+    net = psutil.net_io_counters()
+    net_bytes = net.bytes_sent + net.bytes_recv if net else None
+
+    now = time.monotonic()
+    counters = (server_proc.pid, now, disk_bytes, net_bytes)
+    last = instance.last_counters
+    if last and last[0] == server_proc.pid:
+        _, then, last_disk, last_net = last
+        elapsed = max(now - then, 1e-6)
+        if disk_bytes is not None and last_disk is not None:
+            sample["disk_kbps"] = (disk_bytes - last_disk) / elapsed / 1024
+        if net_bytes is not None and last_net is not None:
+            sample["net_kbps"] = (net_bytes - last_net) / elapsed / 1024
+    instance.last_counters = counters
+    return sample
+
+def _find_server_process(instance):
+    if instance.monitored_proc is not None:
+        try:
+            alive = instance.monitored_proc.is_running()
+        except psutil.Error:
+            alive = False
+        if alive and not instance.attached_to_launcher:
+            return instance.monitored_proc
+        if alive and time.monotonic() < instance.next_lookup:
+            # Sampling the launcher until the -Shipping child shows up; looking for it
+            # walks the process tree, so only every _pid_check_interval seconds.
+            return instance.monitored_proc
+        if not alive:
+            instance.monitored_proc = None
+
+    proc, is_launcher = _attach_launched(instance)
+    if proc is None and len(instances.list_instances()) == 1:
+        # A server started outside the manager can only be attributed when there is one instance.
+        proc, is_launcher = _scan_for_server(), False
+    if proc is None:
+        instance.monitored_proc = None
+        return None
+
+    if instance.monitored_proc is None or proc.pid != instance.monitored_proc.pid:
+        instance.monitored_proc = proc
+        try:
+            proc.cpu_percent(interval=None)
+        except psutil.Error:
+            pass
+    instance.attached_to_launcher = is_launcher
+    if is_launcher:
+        instance.next_lookup = time.monotonic() + _pid_check_interval
+    return instance.monitored_proc
 
-        # ✅ Always sleep here, regardless of success or error
-        time.sleep(_pid_check_interval)
+def _attach_launched(instance):
+    # Prefer the process we launched; MoriaServer.exe hands off to the -Shipping child.
+    if not server_control.is_server_running(instance):
+        return None, False
+    launched = instance.process
+    cached = instance.monitored_proc
+    try:
+        parent = cached if cached is not None and cached.pid == launched.pid else psutil.Process(launched.pid)
+        for child in parent.children(recursive=True):
+            if _SHIPPING_NAME in child.name():
+                return child, False
+        return parent, True
+    except psutil.Error:
+        return None, False
 
-def _find_server_process():
+def _scan_for_server():
+    fallback = None
     for proc in psutil.process_iter(['pid', 'name']):
-        if 'MoriaServer' in proc.info['name']:
-            return psutil.Process(proc.info['pid'])
-    return None
\ No newline at end of file
+        name = proc.info['name'] or ""
+        if _SHIPPING_NAME in name:
+            return proc
+        if fallback is None and 'MoriaServer' in name:
+            fallback = proc
+    return fallback
@@ -0,0 +1,427 @@
+import os
+import io
+import csv
+import json
+import threading
+from modules import event_bus
+from modules.logger import log_error
+
+# In-memory models of MoriaServerPermissions.txt and MoriaServerRules.txt.
+# Each file is parsed once and cached by path; later calls only stat() it and re-parse
+# when the game or a text editor has changed it. Entries live in dicts keyed by the
+# lower-cased player name (plus a per-option index), so lookups, bans and removals
+# don't scan the list. Saves rewrite the whole file atomically, keeping comments and
+# layout. The files only name players, so player IDs are resolved through the names
+# seen in server login lines.
+
+PERMISSIONS_FILE = "MoriaServerPermissions.txt"
+RULES_FILE = "MoriaServerRules.txt"
+
+OPTIONS = ("Blocked", "Default", "NoConstruction", "QuickBuild", "AllConstruction", "NoStorage", "AllStorage")
+BLOCKED = "Blocked"
+DEFAULT_ENTRY = "Default"  # applies to every player without an entry of their own
+_OPTION_NAMES = {option.lower(): option for option in OPTIONS}
+
+_lock = threading.RLock()
+_cache = {}          # (kind, path) -> (mtime_ns, size, model)
+_player_ids = {}     # player id -> name, learned from login lines
+
+
+class PermissionEntry:
+    def __init__(self, name, options, comments=None):
+        self.name = name
+        self.options = options
+        self.comments = comments or []  # comment lines directly above the entry
+
+    def line(self):
+        return f"{self.name} = {','.join(self.options)}"
+
+
+class PermissionsList:
+    def __init__(self, text=""):
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.header = []
+        self.entries = {}        # name lower -> PermissionEntry, in file order
+        self.by_option = {}      # option lower -> set of name lower
+        self.unknown_options = set()
+        pending = []
+        for raw in text.splitlines():
+            line = raw.strip()
+            name, sep, options = line.partition("=")
+            if not line or line.startswith((";", "#")) or not sep or not name.strip():
+                (pending if self.entries else self.header).append(raw)
+                continue
+            self._put(PermissionEntry(name.strip(), _split_options(options), pending))
+            pending = []
+        self.trailer = pending
+
+    def _index(self, entry, add):
+        key = entry.name.lower()
+        for option in entry.options:
+            names = self.by_option.setdefault(option.lower(), set())
+            if add:
+                names.add(key)
+            else:
+                names.discard(key)
+            if add and option.lower() not in _OPTION_NAMES:
+                self.unknown_options.add(option)
+
+    def _put(self, entry):
+        previous = self.entries.get(entry.name.lower())
+        if previous:
+            self._index(previous, add=False)
+            entry.comments = previous.comments
+        self.entries[entry.name.lower()] = entry
+        self._index(entry, add=True)
+
+    def get(self, name):
+        return self.entries.get(name.lower())
+
+    def set(self, name, options):
+        self._put(PermissionEntry(name, _normalize(options)))
+
+    def remove(self, name):
+        entry = self.entries.pop(name.lower(), None)
+        if entry:
+            self._index(entry, add=False)
+        return entry
+
+    def names_with(self, option):
+        return [self.entries[key].name for key in self.by_option.get(option.lower(), ())]
+
+    def is_blocked(self, name):
+        return name.lower() in self.by_option.get(BLOCKED.lower(), ())
+
+    def ban(self, name):
+        # Adds Blocked to the player's options; returns False if they were already blocked.
+        if name.lower() == DEFAULT_ENTRY.lower():
+            raise ValueError(f"Blocking the {DEFAULT_ENTRY} entry would block every new player")
+        if self.is_blocked(name):
+            return False
+        entry = self.get(name)
+        self.set(entry.name if entry else name, (entry.options if entry else []) + [BLOCKED])
+        return True
+
+    def unban(self, name):
+        # Removes only Blocked; an entry that held nothing else goes away with it.
+        entry = self.get(name)
+        if not entry or not self.is_blocked(name):
+            return False
+        remaining = [option for option in entry.options if option.lower() != BLOCKED.lower()]
+        if remaining:
+            self.set(entry.name, remaining)
+        else:
+            self.remove(entry.name)
+        return True
+
+    def render(self):
+        lines = list(self.header)
+        for entry in self.entries.values():
+            lines.extend(entry.comments)
+            lines.append(entry.line())
+        lines.extend(self.trailer)
+        return self.newline.join(lines) + self.newline
+
+    def to_rows(self):
+        return [{"name": entry.name, "options": list(entry.options)} for entry in self.entries.values()]
+
+    def merge_rows(self, rows, replace=False):
+        # Bulk import; returns the number of entries added or changed.
+        if replace:
+            self.entries.clear()
+            self.by_option.clear()
+        changed = 0
+        for row in rows:
+            name = str(row.get("name", "")).strip()
+            if not name or "=" in name:
+                continue
+            options = _normalize(row.get("options") or [])
+            current = self.get(name)
+            if current and [o.lower() for o in current.options] == [o.lower() for o in options]:
+                continue
+            self.set(name, options)
+            changed += 1
+        return changed
+
+
+class RulesList:
+    # MoriaServerRules.txt is free text shown to players; each non-comment line is a rule.
+    # The file is kept line for line, so comments, blank lines and repeated lines survive
+    # a rewrite; the index only points at the cell holding a rule's first occurrence.
+    def __init__(self, text=""):
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.lines = [[raw] for raw in text.splitlines()]  # one cell per line, [None] once removed
+        self.rules = {}   # normalised text -> cell, in file order
+        for cell in self.lines:
+            if _is_rule(cell[0]):
+                self.rules.setdefault(_rule_key(cell[0]), cell)
+
+    def texts(self):
+        return [cell[0].strip() for cell in self.rules.values()]
+
+    def add(self, text):
+        key = _rule_key(text)
+        if not key or key in self.rules:
+            return False
+        # New rules go after the last existing one, ahead of any trailing comments.
+        position = next((index + 1 for index in range(len(self.lines) - 1, -1, -1)
+                         if _is_rule(self.lines[index][0])), len(self.lines))
+        cell = [text.strip()]
+        self.lines.insert(position, cell)
+        self.rules[key] = cell
+        return True
+
+    def remove(self, text_or_number):
+        if str(text_or_number).isdigit():
+            keys = list(self.rules)
+            number = int(text_or_number)
+            if not 1 <= number <= len(keys):
+                return None
+            key = keys[number - 1]
+        else:
+            key = _rule_key(str(text_or_number))
+        cell = self.rules.pop(key, None)
+        if cell is None:
+            return None
+        text, cell[0] = cell[0].strip(), None
+        # A repeated copy of the line, if any, becomes the indexed one.
+        duplicate = next((other for other in self.lines if _is_rule(other[0]) and _rule_key(other[0]) == key), None)
+        if duplicate:
+            self.rules[key] = duplicate
+        return text
+
+    def render(self):
+        return self.newline.join(cell[0] for cell in self.lines if cell[0] is not None) + self.newline
+
+    def to_rows(self):
+        return [{"rule": rule} for rule in self.texts()]
+
+    def merge_rows(self, rows, replace=False):
+        if replace:
+            for cell in self.lines:
+                if _is_rule(cell[0]):
+                    cell[0] = None
+            self.rules.clear()
+        return sum(self.add(str(row.get("rule", ""))) for row in rows)
+
+
+def _split_options(text):
+    return _normalize(part for part in text.split(",") if part.strip())
+
+def _normalize(options):
+    if isinstance(options, str):
+        options = options.replace(";", ",").split(",")
+    return [_OPTION_NAMES.get(o.strip().lower(), o.strip()) for o in options if o.strip()]
+
+def _is_rule(line):
+    return line is not None and bool(line.strip()) and not line.strip().startswith((";", "#"))
+
+def _rule_key(text):
+    return " ".join(text.split()).lower()
+
+def _path(instance, file_name):
+    server_dir = instance.server_path
+    return os.path.join(server_dir, file_name) if server_dir else None
+
+def _load(kind, path, factory):
+    with _lock:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return factory("")
+        cached = _cache.get((kind, path))
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            model = factory(f.read())
+        _cache[(kind, path)] = (stat.st_mtime_ns, stat.st_size, model)
+        return model
+
+def _save(kind, path, model):
+    with _lock:
+        temp = path + ".rtmtmp"
+        with open(temp, "w", encoding="utf-8", newline="") as f:
+            f.write(model.render())
+        os.replace(temp, path)
+        stat = os.stat(path)
+        _cache[(kind, path)] = (stat.st_mtime_ns, stat.st_size, model)
+
+def load_permissions(instance):
+    path = _path(instance, PERMISSIONS_FILE)
+    return _load("permissions", path, PermissionsList) if path else None
+
+def save_permissions(instance, model):
+    _save("permissions", _path(instance, PERMISSIONS_FILE), model)
+
+def load_rules(instance):
+    path = _path(instance, RULES_FILE)
+    return _load("rules", path, RulesList) if path else None
+
+def save_rules(instance, model):
+    _save("rules", _path(instance, RULES_FILE), model)
+
+# --- Import / export -------------------------------------------------------
+
+def export_rows(rows, path):
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        return
+    fields = list(rows[0]) if rows else ["name", "options"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: ",".join(value) if isinstance(value, list) else value for key, value in row.items()})
+
+def import_rows(path):
+    # JSON: a list of row objects, or {name: options} for permissions. CSV: a header row.
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return [{"name": name, "options": options} for name, options in data.items()]
+        return [row for row in data if isinstance(row, dict)]
+    return list(csv.DictReader(io.StringIO(text)))
+
+# --- Player lookup ----------------------------------------------------------
+
+def resolve_player(instance, name_or_id):
+    # Player IDs from login lines map to the account names the permissions file uses.
+    token = name_or_id.strip()
+    return instance.player_names.get(token) or _player_ids.get(token) or token
+
+def _on_login(event):
+    if event.data.get("id") and event.data.get("name"):
+        _player_ids[event.data["id"]] = event.data["name"]
+
+event_bus.subscribe(event_bus.PLAYER_LOGIN, _on_login)
+
+# --- Terminal commands ------------------------------------------------------
+
+def _apply(instance, log, change):
+    # Loads (from cache), applies change(model) -> message or None, and saves on success.
+    path = _path(instance, PERMISSIONS_FILE)
+    if not path:
+        log("❌ RTM Server path not found in settings.json.")
+        return
+    try:
+        with _lock:
+            model = load_permissions(instance)
+            message = change(model)
+            if message is None:
+                return
+            save_permissions(instance, model)
+    except (OSError, ValueError) as e:
+        _cache.pop(("permissions", path), None)  # the cached model may hold the unsaved change
+        log_error(f"[permissions] Failed to update {PERMISSIONS_FILE}: {e}")
+        log(f"❌ Failed to update {PERMISSIONS_FILE}: {e}")
+        return
+    log(message)
+    from modules import server_control
+    if server_control.is_server_running(instance):
+        log("ℹ️ The server reads this file at launch; the change applies after the next restart.")
+
+def ban(instance, name_or_id, log):
+    name = resolve_player(instance, name_or_id)
+    if name.lower() == DEFAULT_ENTRY.lower():
+        log(f"❌ {DEFAULT_ENTRY} is the entry for every player without one; it can't be blocked.")
+        return
+
+    def change(model):
+        if model.ban(name):
+            return f"🚫 {name} is now blocked."
+        log(f"ℹ️ {name} is already blocked.")
+        return None
+    _apply(instance, log, change)
+
+def unban(instance, name_or_id, log):
+    name = resolve_player(instance, name_or_id)
+
+    def change(model):
+        if model.unban(name):
+            return f"✅ {name} is no longer blocked."
+        log(f"ℹ️ {name} is not blocked.")
+        return None
+    _apply(instance, log, change)
+
+def set_options(instance, name, options, log):
+    options = _normalize(options)
+    unknown = [o for o in options if o.lower() not in _OPTION_NAMES]
+    if unknown:
+        log(f"❌ Unknown option(s): {', '.join(unknown)}. Valid: {', '.join(OPTIONS)}")
+        return
+    name = resolve_player(instance, name)
+    _apply(instance, log, lambda model: (model.set(name, options), f"✅ {name} = {','.join(options)}")[1])
+
+def show(instance, name_or_id, log):
+    model = load_permissions(instance)
+    if model is None:
+        log("❌ RTM Server path not found in settings.json.")
+        return
+    name = resolve_player(instance, name_or_id)
+    entry = model.get(name)
+    if entry:
+        log(f"🔑 {entry.line()}")
+    else:
+        default = model.get(DEFAULT_ENTRY)
+        log(f"🔑 {name} has no entry; uses Default ({','.join(default.options) if default else 'server default'}).")
+
+def list_blocked(instance, log):
+    model = load_permissions(instance)
+    names = model.names_with(BLOCKED) if model else []
+    log(f"🚫 {len(names)} blocked: {', '.join(sorted(names, key=str.lower))}" if names else "🚫 Nobody is blocked.")
+
+def import_permissions(instance, path, log, replace=False):
+    try:
+        rows = import_rows(path)
+    except (OSError, ValueError) as e:
+        log(f"❌ Could not read {path}: {e}")
+        return
+    _apply(instance, log, lambda model: f"📥 Imported {model.merge_rows(rows, replace)} permission entries from {path}.")
+
+def export_permissions(instance, path, log):
+    model = load_permissions(instance)
+    if model is None:
+        log("❌ RTM Server path not found in settings.json.")
+        return
+    try:
+        export_rows(model.to_rows(), path)
+        log(f"📤 Exported {len(model.entries)} permission entries to {path}.")
+    except OSError as e:
+        log(f"❌ Could not write {path}: {e}")
+
+def add_rule(instance, text, log):
+    _apply_rules(instance, log, lambda model: "✅ Rule added." if model.add(text) else None, "ℹ️ That rule already exists.")
+
+def remove_rule(instance, text_or_number, log):
+    _apply_rules(instance, log, lambda model: "🗑️ Rule removed." if model.remove(text_or_number) else None, "❓ No such rule.")
+
+def list_rules(instance, log):
+    model = load_rules(instance)
+    if not model or not model.rules:
+        log("📜 No rules set.")
+        return
+    for number, rule in enumerate(model.texts(), 1):
+        log(f"📜 {number}. {rule}")
+
+def _apply_rules(instance, log, change, unchanged):
+    path = _path(instance, RULES_FILE)
+    if not path:
+        log("❌ RTM Server path not found in settings.json.")
+        return
+    try:
+        with _lock:
+            model = load_rules(instance)
+            message = change(model)
+            if message is None:
+                log(unchanged)
+                return
+            save_rules(instance, model)
+    except OSError as e:
+        _cache.pop(("rules", path), None)
+        log_error(f"[permissions] Failed to update {RULES_FILE}: {e}")
+        log(f"❌ Failed to update {RULES_FILE}: {e}")
+        return
+    log(message)
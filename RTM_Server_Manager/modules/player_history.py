@@ -0,0 +1,311 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime, timedelta
+from modules import event_bus, settings_store
+from modules.logger import log_error
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Persistent player session history in SQLite, fed by the join/leave events
+# output_parser publishes. Event handlers only update an in-memory table of open
+# sessions and queue SQL; one writer thread owns the database and commits the queue
+# in batches, so the server output reader never waits on the disk. Besides sessions
+# the store keeps a step series of players online per instance (one row whenever the
+# count changes), which the restart scheduler's "auto" mode reads to find the least
+# populated hour of the day.
+
+DB_PATH = os.path.join(BASE_DIR, "player_history.db")
+BATCH_SIZE = 500
+FLUSH_SECONDS = 5
+DEFAULT_RETENTION_DAYS = 365
+DEFAULT_PROFILE_DAYS = 28
+MIN_PROFILE_HOURS = 24  # less history than this and auto mode falls back to start_time
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY,
+        instance TEXT NOT NULL,
+        player TEXT NOT NULL COLLATE NOCASE,
+        player_id TEXT,
+        joined REAL NOT NULL,
+        left REAL,
+        duration REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS sessions_player ON sessions (player, joined)",
+    "CREATE INDEX IF NOT EXISTS sessions_player_id ON sessions (player_id, joined)",
+    "CREATE INDEX IF NOT EXISTS sessions_time ON sessions (instance, joined)",
+    "CREATE INDEX IF NOT EXISTS sessions_open ON sessions (instance, left)",
+    """CREATE TABLE IF NOT EXISTS concurrency (
+        instance TEXT NOT NULL,
+        time REAL NOT NULL,
+        players INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS concurrency_time ON concurrency (instance, time)",
+)
+
+_lock = threading.Lock()
+_open = {}         # instance id -> {player name lower: (name, player id, joined)}
+_login_ids = {}    # (instance id, player name lower) -> player id from the login line
+_queue = queue.Queue()
+_writer = None
+
+
+def enabled():
+    return settings_store.get("player_history", True)
+
+def _connect():
+    import sqlite3
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    return conn
+
+def _ensure_writer():
+    global _writer
+    with _lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, daemon=True)
+            _writer.start()
+
+def _enqueue(sql, params):
+    _ensure_writer()
+    _queue.put((sql, params))
+
+def _writer_loop():
+    try:
+        conn = _connect()
+        _recover(conn)
+    except Exception as e:
+        log_error(f"[player_history] Could not open {DB_PATH}: {e}")
+        return
+
+    while True:
+        batch = [_queue.get()]
+        waiters = []
+        deadline = time.monotonic() + FLUSH_SECONDS
+        while len(batch) < BATCH_SIZE:
+            if isinstance(batch[-1], threading.Event):
+                break  # a reader is waiting; write what we have now
+            try:
+                batch.append(_queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        try:
+            with conn:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        conn.execute(*item)
+        except Exception as e:
+            log_error(f"[player_history] Failed to write {len(batch)} queued change(s): {e}")
+        for waiter in waiters:
+            waiter.set()
+
+def _recover(conn):
+    # Sessions still open from a previous run (manager killed while players were on)
+    # end at the last change we recorded for their server, which then drops to zero.
+    with conn:
+        rows = conn.execute("SELECT DISTINCT instance FROM sessions WHERE left IS NULL").fetchall()
+        for (instance_id,) in rows:
+            last, players = conn.execute("SELECT time, players FROM concurrency WHERE instance = ? "
+                                         "ORDER BY time DESC, rowid DESC LIMIT 1", (instance_id,)).fetchone() or (0, 0)
+            conn.execute(
+                "UPDATE sessions SET left = MAX(joined, ?), duration = MAX(joined, ?) - joined "
+                "WHERE instance = ? AND left IS NULL", (last, last, instance_id))
+            if players:
+                conn.execute("INSERT INTO concurrency VALUES (?, ?, 0)", (instance_id, last))
+        cutoff = time.time() - settings_store.get("player_history_days", DEFAULT_RETENTION_DAYS) * 86400
+        conn.execute("DELETE FROM sessions WHERE joined < ?", (cutoff,))
+        conn.execute("DELETE FROM concurrency WHERE time < ?", (cutoff,))
+
+def flush(timeout=10):
+    # Blocks until everything queued so far is committed.
+    if _writer is None or not _writer.is_alive():
+        return
+    done = threading.Event()
+    _queue.put(done)
+    done.wait(timeout)
+
+atexit.register(flush, 2)
+
+# --- Event handlers (publisher thread) --------------------------------------
+
+def _on_login(event):
+    instance_id = event.data.get("instance")
+    if event.data.get("name") and event.data.get("id"):
+        _login_ids[(instance_id, event.data["name"].lower())] = event.data["id"]
+
+def _on_join(event):
+    name = event.data.get("name")
+    if not name or not enabled():
+        return
+    instance_id = event.data.get("instance")
+    joined = event.time.timestamp()
+    with _lock:
+        players = _open.setdefault(instance_id, {})
+        if name.lower() in players:
+            return
+        player_id = _login_ids.pop((instance_id, name.lower()), None)
+        players[name.lower()] = (name, player_id, joined)
+        count = len(players)
+    _enqueue("INSERT INTO sessions (instance, player, player_id, joined) VALUES (?, ?, ?, ?)",
+             (instance_id, name, player_id, joined))
+    _enqueue("INSERT INTO concurrency VALUES (?, ?, ?)", (instance_id, joined, count))
+
+def _on_leave(event):
+    name = event.data.get("name")
+    if not name:
+        return
+    instance_id = event.data.get("instance")
+    left = event.time.timestamp()
+    with _lock:
+        session = _open.get(instance_id, {}).pop(name.lower(), None)
+        count = len(_open.get(instance_id, {}))
+    if session:
+        _close(instance_id, session, left)
+        _enqueue("INSERT INTO concurrency VALUES (?, ?, ?)", (instance_id, left, count))
+
+def _on_exit(event):
+    # Whoever was still online left when the server went down.
+    instance_id = event.data.get("instance")
+    left = event.time.timestamp()
+    with _lock:
+        sessions = list(_open.pop(instance_id, {}).values())
+    for session in sessions:
+        _close(instance_id, session, left)
+    if sessions:
+        _enqueue("INSERT INTO concurrency VALUES (?, ?, 0)", (instance_id, left))
+
+def _close(instance_id, session, left):
+    name, _, joined = session
+    _enqueue("UPDATE sessions SET left = ?, duration = ? WHERE instance = ? AND player = ? AND joined = ? AND left IS NULL",
+             (left, left - joined, instance_id, name, joined))
+
+event_bus.subscribe(event_bus.PLAYER_LOGIN, _on_login)
+event_bus.subscribe(event_bus.PLAYER_JOINED, _on_join)
+event_bus.subscribe(event_bus.PLAYER_LEFT, _on_leave)
+event_bus.subscribe(event_bus.SERVER_EXITED, _on_exit)
+
+# --- Queries ----------------------------------------------------------------
+
+def _query(sql, params=()):
+    if _writer is None and not os.path.exists(DB_PATH):
+        return []
+    _ensure_writer()  # recovers sessions left open by a previous run before we read
+    flush()
+    import sqlite3
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as e:
+        log_error(f"[player_history] Query failed: {e}")
+        return []
+    finally:
+        conn.close()
+
+def online(instance_id):
+    with _lock:
+        return [name for name, _, _ in _open.get(instance_id, {}).values()]
+
+def resolve_player(player):
+    # Account name for a player id seen at login; names are returned unchanged.
+    rows = _query("SELECT player FROM sessions WHERE player_id = ? ORDER BY joined DESC LIMIT 1", (player,))
+    return rows[0][0] if rows else player
+
+def player_sessions(player, limit=10):
+    # Newest first; the name matches in any case.
+    return _query("SELECT instance, player, joined, left, duration FROM sessions WHERE player = ? "
+                  "ORDER BY joined DESC LIMIT ?", (player, limit))
+
+def sessions_between(instance_id, start, end):
+    return _query(
+        "SELECT player, joined, left, duration FROM sessions WHERE instance = ? AND joined < ? "
+        "AND (left IS NULL OR left > ?) ORDER BY joined", (instance_id, end, start))
+
+def concurrency_between(instance_id, start, end):
+    # The step series over [start, end], led by the value in force at start.
+    before = _query("SELECT time, players FROM concurrency WHERE instance = ? AND time < ? "
+                    "ORDER BY time DESC, rowid DESC LIMIT 1", (instance_id, start))
+    rows = _query("SELECT time, players FROM concurrency WHERE instance = ? AND time >= ? AND time <= ? "
+                  "ORDER BY time, rowid", (instance_id, start, end))
+    return [(start, before[0][1])] + rows if before else rows
+
+def hourly_profile(instance_id, days=DEFAULT_PROFILE_DAYS, now=None):
+    # Returns ({hour: (average players, peak players)}, hours of history covered).
+    # Averages are time-weighted over the local hour of day.
+    end = now or time.time()
+    series = concurrency_between(instance_id, end - days * 86400, end)
+    weighted = [0.0] * 24
+    covered = [0.0] * 24
+    peaks = [0] * 24
+    for index, (start, players) in enumerate(series):
+        stop = series[index + 1][0] if index + 1 < len(series) else end
+        while start < stop:
+            local = datetime.fromtimestamp(start)
+            boundary = (local.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)).timestamp()
+            chunk = min(stop, boundary) - start
+            weighted[local.hour] += players * chunk
+            covered[local.hour] += chunk
+            peaks[local.hour] = max(peaks[local.hour], players)
+            start += chunk
+    profile = {hour: (weighted[hour] / covered[hour], peaks[hour]) for hour in range(24) if covered[hour]}
+    return profile, sum(covered) / 3600
+
+def quietest_hour(instance_id, preferred=0, days=DEFAULT_PROFILE_DAYS):
+    # Least populated hour of the day, ties broken by lower peak and then by closeness
+    # to the preferred hour. None until there is enough history to judge.
+    profile, hours = hourly_profile(instance_id, days)
+    if hours < MIN_PROFILE_HOURS or len(profile) < 24:
+        return None
+    distance = lambda hour: min((hour - preferred) % 24, (preferred - hour) % 24)
+    return min(profile, key=lambda hour: (round(profile[hour][0], 2), profile[hour][1], distance(hour)))
+
+def peak(instance_id, start=0):
+    rows = _query("SELECT players, time FROM concurrency WHERE instance = ? AND time >= ? "
+                  "ORDER BY players DESC, time DESC LIMIT 1", (instance_id, start))
+    return rows[0] if rows else None
+
+# --- Terminal commands ------------------------------------------------------
+
+def _duration(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+def log_player(player, log):
+    rows = player_sessions(resolve_player(player))
+    if not rows:
+        log(f"👤 No sessions recorded for {player}.")
+        return
+    total = _query("SELECT COUNT(*), SUM(duration) FROM sessions WHERE player = ?", (rows[0][1],))[0]
+    log(f"👤 {rows[0][1]}: {total[0]} session(s), {_duration(total[1] or 0)} played. Latest:")
+    for instance_id, _, joined, left, duration in rows:
+        span = f"{_duration(duration)}" if left else "online now"
+        log(f"    {datetime.fromtimestamp(joined):%Y-%m-%d %H:%M} | {span} | {instance_id}")
+
+def log_profile(instance, log, days=DEFAULT_PROFILE_DAYS):
+    profile, hours = hourly_profile(instance.id, days)
+    if not profile:
+        log("👥 No player history recorded yet.")
+        return
+    top = peak(instance.id)
+    if top:
+        log(f"👥 Peak: {top[0]} player(s) online at {datetime.fromtimestamp(top[1]):%Y-%m-%d %H:%M}.")
+    log(f"👥 Players online by hour, last {days} days ({hours:.0f}h of history) – average / peak:")
+    for hour in range(24):
+        if hour in profile:
+            average, high = profile[hour]
+            log(f"    {hour:02d}:00  {average:5.2f} / {high:<3} {'█' * round(average * 4)}")
+    quiet = quietest_hour(instance.id, days=days)
+    if quiet is None:
+        log(f"ℹ️ Auto restarts need {MIN_PROFILE_HOURS}h of history covering every hour before picking a time.")
+    else:
+        log(f"🌙 Least populated hour: {quiet:02d}:00.")
@@ -1,65 +1,60 @@
-import json
 import os
 import sys
+import heapq
 import threading
 import time
 from datetime import datetime, timedelta
-from modules import notifications, server_control
+from modules import notifications, supervisor, settings_store, instances, player_history, event_bus, runtime_stats
 from modules.logger import log_error
-from modules.config import SETTINGS_PATH
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = os.path.dirname(sys.executable)
 else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+EVENT_WARNING = "warning"
+EVENT_RESTART = "restart"
+EVENT_PRESTAGE = "prestage"
+EVENT_CHECK = "check"
+DEFAULT_WARNING_MINUTES = [90, 60, 30, 10, 5]
+DEFAULT_PRESTAGE_MINUTES = 15
+DEFAULT_MIN_UPTIME_HOURS = 4
+DEFAULT_MAX_UPTIME_HOURS = 8
+_MAX_SLEEP = 300
+
 _restart_thread = None
 _stop_flag = False
-_restart_lock = threading.Lock()
-
-def load_restart_settings():
-    if not os.path.exists(SETTINGS_PATH):
-        return {}
-
-    try:
-        with open(SETTINGS_PATH, "r") as f:
-            return json.load(f).get("restart_schedule", {})
-    except Exception as e:
-        log_error(f"[RestartScheduler] Failed to load restart settings: {e}")
-        return {}
-
-def save_restart_settings(data):
-    settings = {}
-    if os.path.exists(SETTINGS_PATH):
-        try:
-            with open(SETTINGS_PATH, "r") as f:
-                settings = json.load(f)
-        except Exception as e:
-            log_error(f"[RestartScheduler] Failed to read settings.json: {e}")
+_dirty = True
+_next_restart = {}  # instance id -> datetime
+_committed = {}     # instance id -> (server_started_at, restart timestamp or None once fired), adaptive mode
+_wakeup = threading.Condition()
 
-    settings["restart_schedule"] = data
+def load_restart_settings(instance=None):
+    return (instance or instances.active()).get_setting("restart_schedule", {})
 
+def save_restart_settings(data, instance=None):
     try:
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump(settings, f, indent=4)
+        (instance or instances.active()).set_setting("restart_schedule", data)
     except Exception as e:
         log_error(f"[RestartScheduler] Failed to save restart schedule: {e}")
 
-def get_next_restart_time(settings):
-    now = datetime.now()
+def get_next_restart_time(settings, now=None):
+    now = now or datetime.now()
     mode = settings.get("mode", "hourly")
 
     if mode == "hourly":
         last_start_str = settings.get("last_start")
-        freq_hours = int(settings.get("frequency", 1))
+        freq = timedelta(hours=int(settings.get("frequency", 1)))
         if not last_start_str:
-            return now + timedelta(hours=freq_hours)
+            return now + freq
         last_start = datetime.strptime(last_start_str, "%Y-%m-%d %H:%M:%S")
-        while last_start <= now:
-            last_start += timedelta(hours=freq_hours)
-        return last_start
+        if last_start > now:
+            return last_start
+        # First multiple of the frequency strictly after now, in closed form.
+        periods = (now - last_start) // freq + 1
+        return last_start + periods * freq
 
-    elif mode == "designated":
+    elif mode in ("designated", "auto"):
         start_time_str = settings.get("start_time", "00:00")
         try:
             scheduled = datetime.strptime(start_time_str, "%H:%M").replace(
@@ -74,54 +69,230 @@ def get_next_restart_time(settings):
 
     return now + timedelta(hours=1)  # fallback
 
+def auto_start_time(instance, settings):
+    # "auto" mode restarts daily at the least populated hour in the player history,
+    # re-picked every time the schedule is rebuilt; start_time is the fallback (and the
+    # tie-breaker) until there is enough history.
+    fallback = settings.get("start_time", "00:00")
+    try:
+        preferred = int(fallback.split(":")[0])
+    except ValueError:
+        preferred = 0
+    hour = player_history.quietest_hour(instance.id, preferred, settings.get("auto_days", player_history.DEFAULT_PROFILE_DAYS))
+    return fallback if hour is None else f"{hour:02d}:00"
+
+def build_schedule(settings, now=None, next_restart=None):
+    # Returns a heap of (timestamp, kind, minutes_left) entries for the next restart,
+    # every warning still ahead of it and the update pre-stage.
+    now = now or datetime.now()
+    next_restart = next_restart or get_next_restart_time(settings, now)
+    events = [(next_restart.timestamp(), EVENT_RESTART, 0)]
+
+    warning_minutes = set(settings.get("warning_minutes", DEFAULT_WARNING_MINUTES))
+    if settings.get("warnings", False):
+        for minutes in warning_minutes:
+            when = next_restart - timedelta(minutes=minutes)
+            if when >= now:
+                events.append((when.timestamp(), EVENT_WARNING, minutes))
+
+    if settings.get("prestage", True):
+        # Starts with the warning window, so the download overlaps the countdown.
+        lead = settings.get("prestage_minutes")
+        if lead is None:
+            lead = max(warning_minutes) if settings.get("warnings", False) and warning_minutes else DEFAULT_PRESTAGE_MINUTES
+        when = next_restart - timedelta(minutes=lead)
+        if when >= now:
+            events.append((when.timestamp(), EVENT_PRESTAGE, lead))
+
+    heapq.heapify(events)
+    return events
+
+def adaptive_schedule(instance, settings, log=None, now=None):
+    # "adaptive" mode: restart once the server has been up min_uptime_hours, at the first
+    # moment no more than max_players are online (live count from the server output),
+    # and no later than max_uptime_hours. Until a restart time is committed only EVENT_CHECK
+    # wake-ups are scheduled, so warnings and the pre-stage only go out for a real restart.
+    # Returns (schedule, expected restart time or None).
+    now = now or datetime.now()
+    stats = runtime_stats.snapshot(instance.id)
+    started = stats["server_started_at"]
+    committed = _committed.get(instance.id)
+    if committed and committed[0] != started:
+        _committed.pop(instance.id)
+        committed = None
+    if not started:
+        return [], None
+    if committed:
+        if not committed[1]:
+            return [], None
+        restart_at = datetime.fromtimestamp(committed[1])
+        return build_schedule(settings, now, restart_at), restart_at
+
+    warning_minutes = settings.get("warning_minutes", DEFAULT_WARNING_MINUTES) if settings.get("warnings", False) else []
+    window = started + float(settings.get("min_uptime_hours", DEFAULT_MIN_UPTIME_HOURS)) * 3600
+    deadline = started + float(settings.get("max_uptime_hours", DEFAULT_MAX_UPTIME_HOURS)) * 3600
+    commit_by = deadline - max(warning_minutes, default=0) * 60  # leaves room for every warning
+    players = stats["players_online"]
+
+    if now.timestamp() >= window and players <= int(settings.get("max_players", 0)):
+        # Empty servers restart now; otherwise the shortest warning still goes out.
+        lead = min(warning_minutes, default=0) if players else 0
+        restart_at = now.timestamp() + lead * 60
+        reason = f"{players} player(s) online" if players else "server is empty"
+    elif now.timestamp() >= commit_by:
+        restart_at = max(deadline, now.timestamp() + max(warning_minutes, default=0) * 60)
+        reason = f"uptime limit reached with {players} player(s) online"
+    else:
+        checks = [(when, EVENT_CHECK, 0) for when in (window, commit_by) if when > now.timestamp()]
+        return checks, datetime.fromtimestamp(deadline)
+
+    _committed[instance.id] = (started, restart_at)
+    if log:
+        instance.tag(log)(f"♻️ Adaptive restart committed for {datetime.fromtimestamp(restart_at):%H:%M} ({reason}).")
+    restart_at = datetime.fromtimestamp(restart_at)
+    return build_schedule(settings, now, restart_at), restart_at
+
+def get_scheduled_restart(instance=None):
+    return _next_restart.get((instance or instances.active()).id)
+
 def start_watchdog(log_func):
-    global _restart_thread, _stop_flag
-    _stop_flag = False
+    global _restart_thread, _stop_flag, _dirty
+    with _wakeup:
+        _stop_flag = False
+        _dirty = True
 
     if _restart_thread and _restart_thread.is_alive():
         log_func("🔁 Restart watchdog already running.")
         return
 
+    settings_store.unsubscribe(_on_settings_changed)
+    settings_store.subscribe(_on_settings_changed)
     _restart_thread = threading.Thread(target=_watchdog_loop, args=(log_func,), daemon=True)
     _restart_thread.start()
     log_func("🕒 Restart watchdog started.")
 
 def stop_watchdog():
     global _stop_flag
-    _stop_flag = True
+    with _wakeup:
+        _stop_flag = True
+        _wakeup.notify_all()
 
-def _watchdog_loop(log_func):
-    last_warning = None
+def reschedule():
+    global _dirty
+    with _wakeup:
+        _dirty = True
+        _wakeup.notify_all()
+
+def _on_settings_changed(changed):
+    if changed & {"restart_schedule", "instances"}:
+        reschedule()
+
+def _on_server_event(event):
+    # Player counts and server starts/exits move adaptive schedules.
+    _reschedule_adaptive(instances.get(event.data.get("instance")))
+
+def _on_state_changed(instance, state):
+    # The uptime window is anchored at launch, whether or not the ready line is recognised.
+    if state == supervisor.STATE_RUNNING:
+        _reschedule_adaptive(instance)
+
+def _reschedule_adaptive(instance):
+    if instance and load_restart_settings(instance).get("mode") == "adaptive":
+        reschedule()
 
-    while not _stop_flag:
-        settings = load_restart_settings()
+def _load_schedule(log_func=None):
+    # One heap for every instance; entries carry the instance id.
+    global _next_restart
+    next_restart = {}
+    events = []
+    for instance in instances.list_instances():
+        settings = load_restart_settings(instance)
         if not settings.get("enabled", False):
-            time.sleep(10)
             continue
 
-        next_restart = get_next_restart_time(settings)
-        now = datetime.now()
-        minutes_left = int((next_restart - now).total_seconds() / 60)
+        if settings.get("mode", "hourly") == "hourly" and not settings.get("last_start"):
+            # Anchor the hourly cadence so it survives manager restarts.
+            settings["last_start"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            save_restart_settings(settings, instance)
 
-        warning_times = settings.get("warning_minutes", [90, 60, 30, 10, 5])
-        if settings.get("warnings", False) and minutes_left in warning_times:
-            msg = f"⏰ RTM Server will restart in {minutes_left} minutes."
-            notifications.send_terminal_webhook_desktop(log_func, msg, "RTM Server Manager", msg)
-            last_warning = minutes_left
+        if settings.get("mode") == "adaptive":
+            schedule, restart_at = adaptive_schedule(instance, settings, log_func)
+            if restart_at:
+                next_restart[instance.id] = restart_at
+            events.extend((when, kind, minutes, instance.id) for when, kind, minutes in schedule)
+            continue
+        if settings.get("mode") == "auto":
+            settings = dict(settings, start_time=auto_start_time(instance, settings))
+        schedule = build_schedule(settings)
+        next_restart[instance.id] = datetime.fromtimestamp(max(when for when, _, _ in schedule))
+        events.extend((when, kind, minutes, instance.id) for when, kind, minutes in schedule)
+
+    _next_restart = next_restart
+    heapq.heapify(events)
+    return events
+
+def _watchdog_loop(log_func):
+    global _dirty
+    events = []
 
-        if minutes_left <= 0:
-            with _restart_lock:
-                log_func("♻️ Scheduled restart time reached. Restarting server...")
-                notifications.send_terminal_webhook_desktop(log_func, "♻️ Scheduled Restart Executing", "RTM Server Manager", "RTM Restarting now.")
-                server_control.stop_server(log_func)
-                time.sleep(3)
-                server_control.start_server(log_func)
+    while True:
+        with _wakeup:
+            if _stop_flag:
+                return
+            rebuild, _dirty = _dirty, False
+        if rebuild:
+            # Built outside the lock: auto mode queries the player history database, and
+            # reschedule() callers (GUI thread, event publishers) must not wait on that.
+            # A reschedule() meanwhile just sets _dirty again for the next pass.
+            events = _load_schedule(log_func)
+
+        with _wakeup:
+            if _stop_flag:
+                return
+            if _dirty:
+                continue
+            if not events:
+                # Still rebuilt every few minutes: an adaptive schedule may be waiting on a
+                # server start that no event announced.
+                _wakeup.wait(_MAX_SLEEP)
+                _dirty = True
+                continue
+            delay = events[0][0] - time.time()
+            if delay > 0:
+                # Capped so a wall-clock jump (suspend, DST) is noticed within a few minutes.
+                _wakeup.wait(min(delay, _MAX_SLEEP))
+                continue
+            _, kind, minutes, instance_id = heapq.heappop(events)
+
+        instance = instances.get(instance_id)
+        if instance is None:
+            continue
+        log = instance.tag(log_func)
+        if kind == EVENT_WARNING:
+            msg = f"⏰ RTM Server will restart in {minutes} minutes."
+            notifications.send_terminal_webhook_desktop(log, msg, "RTM Server Manager", msg)
+        elif kind == EVENT_PRESTAGE:
+            supervisor.submit("prestage", log, instance)
+        elif kind == EVENT_CHECK:
+            reschedule()
+        else:
+            _run_restart(instance, log)
+            reschedule()
 
-                if settings.get("mode") == "hourly":
-                    settings["last_start"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    save_restart_settings(settings)
+def _run_restart(instance, log_func):
+    # Queued rather than awaited so one instance's restart never delays another's schedule.
+    log_func("♻️ Scheduled restart time reached. Restarting server...")
+    notifications.send_terminal_webhook_desktop(log_func, "♻️ Scheduled Restart Executing", "RTM Server Manager", "RTM Restarting now.")
+    supervisor.submit("restart", log_func, instance)
+    if instance.id in _committed:
+        _committed[instance.id] = (_committed[instance.id][0], None)  # wait for the new server run
 
-                last_warning = None
-                time.sleep(60)
+    settings = load_restart_settings(instance)
+    if settings.get("mode") == "hourly":
+        settings["last_start"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        save_restart_settings(settings, instance)
 
-        time.sleep(30)
+event_bus.subscribe(event_bus.PLAYER_LEFT, _on_server_event)
+event_bus.subscribe(event_bus.SERVER_READY, _on_server_event)
+event_bus.subscribe(event_bus.SERVER_EXITED, _on_server_event)
+supervisor.add_state_listener(_on_state_changed)
@@ -0,0 +1,65 @@
+import time
+import threading
+from modules import event_bus
+from modules.instances import DEFAULT_INSTANCE_ID
+
+# In-memory counters describing the managed servers, kept cheap to read so exporters
+# and status commands never have to touch the process or the disk.
+# Manager-wide values live in _manager; per-server values are keyed by instance id.
+
+_lock = threading.Lock()
+_manager = {
+    "manager_started_at": time.time(),
+    "last_update_seconds": None,
+}
+_instances = {}
+
+def _new_stats():
+    return {
+        "server_started_at": None,
+        "restarts": 0,
+        "crashes": 0,
+        "players_online": 0,
+        "last_shutdown_seconds": None,
+        "forced_stops": 0,
+    }
+
+def _stats(instance_id):
+    return _instances.setdefault(instance_id or DEFAULT_INSTANCE_ID, _new_stats())
+
+def snapshot(instance_id=None):
+    with _lock:
+        return {**_manager, **_stats(instance_id)}
+
+def set_value(name, value, instance_id=None):
+    with _lock:
+        target = _manager if name in _manager else _stats(instance_id)
+        target[name] = value
+
+def increment(name, amount=1, instance_id=None):
+    with _lock:
+        stats = _stats(instance_id)
+        stats[name] = stats.get(name, 0) + amount
+
+def mark_server_started(instance_id=None):
+    with _lock:
+        stats = _stats(instance_id)
+        stats["server_started_at"] = time.time()
+        stats["players_online"] = 0
+
+def mark_server_stopped(instance_id=None):
+    with _lock:
+        stats = _stats(instance_id)
+        stats["server_started_at"] = None
+        stats["players_online"] = 0
+
+def player_joined(instance_id=None):
+    increment("players_online", instance_id=instance_id)
+
+def player_left(instance_id=None):
+    with _lock:
+        stats = _stats(instance_id)
+        stats["players_online"] = max(0, stats["players_online"] - 1)
+
+event_bus.subscribe(event_bus.PLAYER_JOINED, lambda event: player_joined(event.data.get("instance")))
+event_bus.subscribe(event_bus.PLAYER_LEFT, lambda event: player_left(event.data.get("instance")))
@@ -0,0 +1,374 @@
+import os
+import ipaddress
+from collections import namedtuple
+from modules.logger import log_error
+
+# Reads, validates and edits MoriaServerConfig.ini without disturbing it.
+# ConfigDocument keeps every original line (comments, blank lines, ordering, quoting)
+# and only rewrites the lines whose values change, so a save through the manager
+# diffs cleanly against a hand-edited file. SCHEMA describes the keys the dedicated
+# server documents; unknown keys are kept and reported as warnings, since they are
+# usually typos.
+
+CONFIG_FILE = "MoriaServerConfig.ini"
+
+# What a changed key needs before it takes effect.
+EFFECT_RESTART = "restart"        # read by the server at launch
+EFFECT_NEW_WORLD = "new_world"    # only used when a new world is generated
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+ConfigField = namedtuple("ConfigField", ["section", "key", "kind", "choices", "minimum", "maximum", "effect"])
+ConfigIssue = namedtuple("ConfigIssue", ["severity", "section", "key", "message"])
+ConfigChange = namedtuple("ConfigChange", ["section", "key", "old", "new", "effect"])
+
+_LEVELS = ("verylow", "low", "default", "high", "veryhigh")
+
+def _field(section, key, kind, choices=None, minimum=None, maximum=None, effect=EFFECT_RESTART):
+    return ConfigField(section, key, kind, choices, minimum, maximum, effect)
+
+SCHEMA = (
+    _field("Main", "OptionalPassword", "str"),
+    _field("World", "Name", "str"),
+    _field("World", "OptionalWorldFilename", "str"),
+    _field("World.Create", "Type", "choice", ("campaign", "sandbox"), effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Seed", "seed", effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Preset", "choice", ("story", "solo", "normal", "hard", "custom"), effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.CombatDifficulty", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.EnemyAggression", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.SurvivalDifficulty", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.MiningDrops", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.WorldDrops", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.HordeFrequency", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.SiegeFrequency", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("World.Create", "Difficulty.Custom.PatrolFrequency", "choice", _LEVELS, effect=EFFECT_NEW_WORLD),
+    _field("Host", "ListenAddress", "ip", ("",)),
+    _field("Host", "ListenPort", "port", ("-1",)),
+    _field("Host", "AdvertiseAddress", "ip", ("auto", "local")),
+    _field("Host", "AdvertisePort", "port", ("",)),
+    _field("Host", "InitialConnectionRetryTime", "int", minimum=0),
+    _field("Host", "AfterDisconnectionRetryTime", "int", minimum=0),
+    _field("Console", "Enabled", "bool"),
+    _field("Performance", "ServerFPS", "int", minimum=1, maximum=240),
+    _field("Performance", "LoadedAreaLimit", "int", minimum=4, maximum=32),
+)
+
+_SCHEMA_INDEX = {(f.section.lower(), f.key.lower()): f for f in SCHEMA}
+
+def schema_field(section, key):
+    return _SCHEMA_INDEX.get((section.lower(), key.lower()))
+
+
+class ConfigDocument:
+    def __init__(self, text=""):
+        # The BOM is kept aside and written back by save, so the file round-trips.
+        self.bom = text.startswith("\ufeff")
+        text = text[1:] if self.bom else text
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.lines = text.splitlines()
+        self.trailing_newline = text.endswith(("\n", "\r"))
+        self._index()
+
+    def _index(self):
+        # (section, key) lower-cased -> entry dict; the first occurrence wins, like the game.
+        self.entries = {}
+        self.order = []
+        self.sections = {}      # section lower -> (name, header line index, last line index)
+        self.duplicates = []
+        section = ""
+        comments = []
+        for number, raw in enumerate(self.lines):
+            line = raw.strip()
+            if not line:
+                comments = []
+                continue
+            if line.startswith((";", "#")):
+                comments.append(line.lstrip(";#").strip())
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1].strip()
+                self.sections.setdefault(section.lower(), [section, number, number])
+                comments = []
+                continue
+            if section.lower() in self.sections:
+                self.sections[section.lower()][2] = number
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if not sep or not key:
+                comments = []
+                continue
+            value = value.strip()
+            quoted = len(value) >= 2 and value[0] == value[-1] == '"'
+            entry = {
+                "section": section, "key": key, "value": value[1:-1] if quoted else value,
+                "quoted": quoted, "line": number, "help": "\n".join(comments),
+            }
+            ident = (section.lower(), key.lower())
+            if ident in self.entries:
+                self.duplicates.append(entry)
+            else:
+                self.entries[ident] = entry
+                self.order.append(ident)
+            comments = []
+
+    def get(self, section, key, default=None):
+        entry = self.entries.get((section.lower(), key.lower()))
+        return entry["value"] if entry else default
+
+    def help(self, section, key):
+        entry = self.entries.get((section.lower(), key.lower()))
+        return entry["help"] if entry else ""
+
+    def items(self):
+        for ident in self.order:
+            entry = self.entries[ident]
+            yield entry["section"], entry["key"], entry["value"]
+
+    def values(self):
+        return {(section.lower(), key.lower()): value for section, key, value in self.items()}
+
+    def labels(self):
+        # Original spelling of each key, for messages.
+        return {ident: (self.entries[ident]["section"], self.entries[ident]["key"]) for ident in self.order}
+
+    def set(self, section, key, value):
+        value = str(value)
+        entry = self.entries.get((section.lower(), key.lower()))
+        if entry:
+            if entry["value"] == value:
+                return
+            quoted = entry["quoted"] or _needs_quotes(value)
+            raw = self.lines[entry["line"]]
+            indent = raw[:len(raw) - len(raw.lstrip())]
+            self.lines[entry["line"]] = f"{indent}{entry['key']}={_quote(value) if quoted else value}"
+        else:
+            line = f"{key}={_quote(value) if _needs_quotes(value) else value}"
+            found = self.sections.get(section.lower())
+            if found:
+                self.lines.insert(found[2] + 1, line)
+            else:
+                if self.lines and self.lines[-1].strip():
+                    self.lines.append("")
+                self.lines.extend((f"[{section}]", line))
+        self._index()
+
+    def render(self):
+        text = self.newline.join(self.lines)
+        return text + self.newline if self.trailing_newline or not self.lines else text
+
+
+def _needs_quotes(value):
+    return value != value.strip() or any(ch in value for ch in ' ;"')
+
+def _quote(value):
+    return '"' + value + '"'
+
+def _check_value(field, value):
+    # Returns an error message, or None when the value is acceptable.
+    if '"' in value:
+        return 'must not contain double quotes (")'
+    text = value.strip()
+    lowered = text.lower()
+    if field.choices and lowered in field.choices and field.kind != "choice":
+        return None
+    if field.kind == "choice":
+        if lowered not in field.choices:
+            return f"must be one of: {', '.join(field.choices)}"
+    elif field.kind == "bool":
+        if lowered not in ("true", "false"):
+            return "must be true or false"
+    elif field.kind in ("int", "port"):
+        try:
+            number = int(text)
+        except ValueError:
+            return "must be a whole number"
+        minimum, maximum = (1, 65535) if field.kind == "port" else (field.minimum, field.maximum)
+        if minimum is not None and number < minimum:
+            return f"must be at least {minimum}"
+        if maximum is not None and number > maximum:
+            return f"must be at most {maximum}"
+    elif field.kind == "seed":
+        if lowered != "random":
+            try:
+                int(text)
+            except ValueError:
+                return "must be random or a whole number"
+    elif field.kind == "ip":
+        try:
+            ipaddress.ip_address(text)
+        except ValueError:
+            allowed = " or ".join(f"'{c}'" if c else "empty" for c in field.choices)
+            return f"must be an IP address, {allowed}"
+    return None
+
+def validate(document):
+    issues = []
+    for section, key, value in document.items():
+        field = schema_field(section, key)
+        if field is None:
+            if '"' in value:
+                issues.append(ConfigIssue(SEVERITY_ERROR, section, key, f"'{value}' must not contain double quotes (\")"))
+            elif section.lower() in {f.section.lower() for f in SCHEMA}:
+                issues.append(ConfigIssue(SEVERITY_WARNING, section, key, "unknown key (typo?); the server will ignore it"))
+            continue
+        problem = _check_value(field, value)
+        if problem:
+            issues.append(ConfigIssue(SEVERITY_ERROR, section, key, f"'{value}' {problem}"))
+    for entry in document.duplicates:
+        issues.append(ConfigIssue(SEVERITY_WARNING, entry["section"], entry["key"], f"duplicate key on line {entry['line'] + 1}; only the first is used"))
+
+    listen = document.get("Host", "ListenPort", "")
+    advertise = document.get("Host", "AdvertisePort", "")
+    if listen and advertise and listen == advertise:
+        issues.append(ConfigIssue(SEVERITY_WARNING, "Host", "AdvertisePort", "same as ListenPort; leave it empty instead"))
+    return issues
+
+def errors(issues):
+    return [issue for issue in issues if issue.severity == SEVERITY_ERROR]
+
+def format_issue(issue):
+    icon = "❌" if issue.severity == SEVERITY_ERROR else "⚠️"
+    return f"{icon} [{issue.section}] {issue.key}: {issue.message}"
+
+def diff(old_values, new_values, labels=None):
+    # Minimal change list between two values() dicts, in new-file order; values are
+    # compared case-sensitively except for keys the schema treats as keywords.
+    labels = labels or {}
+    changes = []
+    for ident in list(new_values) + [i for i in old_values if i not in new_values]:
+        old, new = old_values.get(ident), new_values.get(ident)
+        field = _SCHEMA_INDEX.get(ident)
+        if field and field.kind in ("choice", "bool") and old is not None and new is not None:
+            same = old.strip().lower() == new.strip().lower()
+        else:
+            same = old == new
+        if not same:
+            effect = field.effect if field else EFFECT_RESTART
+            section, key = (field.section, field.key) if field else labels.get(ident, ident)
+            changes.append(ConfigChange(section, key, old, new, effect))
+    return changes
+
+def needs_restart(changes):
+    return any(change.effect == EFFECT_RESTART for change in changes)
+
+def format_change(change):
+    old = "(unset)" if change.old is None else f"'{change.old}'"
+    new = "(removed)" if change.new is None else f"'{change.new}'"
+    note = "" if change.effect == EFFECT_RESTART else " (new worlds only)"
+    return f"[{change.section}] {change.key}: {old} → {new}{note}"
+
+def config_path(instance):
+    server_dir = instance.server_path
+    return os.path.join(server_dir, CONFIG_FILE) if server_dir else None
+
+def load(instance):
+    path = config_path(instance)
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return ConfigDocument(f.read())
+
+def save(instance, document):
+    path = config_path(instance)
+    temp = path + ".rtmtmp"
+    with open(temp, "w", encoding="utf-8-sig" if document.bom else "utf-8", newline="") as f:
+        f.write(document.render())
+    os.replace(temp, path)
+
+def remember_running(instance):
+    # Snapshot of what the server was launched with, for pending_changes().
+    try:
+        document = load(instance)
+        instance.running_config = document.values() if document else None
+    except OSError as e:
+        log_error(f"[server_config] Could not snapshot {CONFIG_FILE}: {e}")
+        instance.running_config = None
+
+def pending_changes(instance, document=None):
+    if instance.running_config is None:
+        return []
+    document = document or load(instance)
+    if document is None:
+        return diff(instance.running_config, {})
+    return diff(instance.running_config, document.values(), document.labels())
+
+def check_before_start(instance, log):
+    # Rejects a broken config before anything is stopped or updated.
+    try:
+        document = load(instance)
+    except OSError as e:
+        log(f"⚠️ Could not read {CONFIG_FILE}: {e}")
+        return True
+    if document is None:
+        return True
+    issues = validate(document)
+    problems = errors(issues)
+    for issue in problems:
+        log(format_issue(issue))
+    if problems:
+        log(f"❌ {CONFIG_FILE} has {len(problems)} invalid value(s); fix them before starting the server.")
+        return False
+    return True
+
+def save_and_apply(instance, document, log, restart_if_needed=False):
+    # Validates, writes, and restarts the server only when a changed key needs it.
+    issues = validate(document)
+    for issue in issues:
+        log(format_issue(issue))
+    if errors(issues):
+        log(f"❌ {CONFIG_FILE} not saved; fix the errors above first.")
+        return False
+
+    try:
+        save(instance, document)
+    except OSError as e:
+        log_error(f"[server_config] Failed to save {CONFIG_FILE}: {e}")
+        log(f"❌ Failed to save {CONFIG_FILE}: {e}")
+        return False
+    log(f"💾 Saved {CONFIG_FILE}.")
+
+    from modules import server_control, supervisor
+    if not server_control.is_server_running(instance):
+        log("ℹ️ Changes will be used the next time the server starts.")
+        return True
+
+    changes = pending_changes(instance, document)
+    if not changes:
+        log("✅ The running server already uses these settings.")
+        return True
+    for change in changes:
+        log(f"   {format_change(change)}")
+    if not needs_restart(changes):
+        log("✅ No restart needed; these settings only apply to newly created worlds.")
+    elif restart_if_needed:
+        supervisor.submit("restart", log, instance)
+    else:
+        log(f"♻️ {sum(c.effect == EFFECT_RESTART for c in changes)} change(s) take effect after a restart.")
+    return True
+
+def report(instance, log):
+    # Terminal 'config check': validation issues plus what a restart would change.
+    try:
+        document = load(instance)
+    except OSError as e:
+        log(f"❌ Could not read {CONFIG_FILE}: {e}")
+        return
+    if document is None:
+        log(f"❌ No {CONFIG_FILE} in the server directory.")
+        return
+    issues = validate(document)
+    for issue in issues:
+        log(format_issue(issue))
+    if not issues:
+        log(f"✅ {CONFIG_FILE} is valid.")
+
+    from modules import server_control
+    if server_control.is_server_running(instance):
+        changes = pending_changes(instance, document)
+        for change in changes:
+            log(f"   {format_change(change)}")
+        if needs_restart(changes):
+            log("♻️ The running server is using older settings; restart to apply them.")
+        elif not changes:
+            log("✅ The running server uses the current settings.")
@@ -1,14 +1,10 @@
 import os
 import sys
 import subprocess
-import threading
 import time
-import platform
-import json
-from PyQt5.QtWidgets import QApplication
-from modules import notifications
+import threading
+from modules import notifications, steam_update, settings_store, runtime_stats, output_parser, instances, event_bus, server_config
 from modules.logger import log_error
-from modules.config import SETTINGS_PATH
 
 
 if getattr(sys, 'frozen', False):
@@ -16,79 +12,75 @@ if getattr(sys, 'frozen', False):
 else:
     BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-STEAMCMD_DIR = os.path.join(BASE_DIR, "steamcmd")
-STEAMCMD_EXE = os.path.join(STEAMCMD_DIR, "steamcmd.exe" if platform.system() == "Windows" else "steamcmd.sh")
-STEAM_APP_ID = "3349480"
-
-server_process = None
+def is_server_running(instance=None):
+    instance = instance or instances.active()
+    return instance.process is not None and instance.process.poll() is None
 
-def is_server_running():
-    return server_process is not None and server_process.poll() is None
-
-def start_server(log):
-    global server_process
+def start_server(instance, log):
+    target = prepare_start(instance, log)
+    if not target:
+        return
+    server_dir, server_exe = target
+    if update_server(instance, log, server_dir):
+        launch_server(instance, log, server_dir, server_exe)
 
-    if is_server_running():
+def prepare_start(instance, log):
+    if is_server_running(instance):
         log("⚠️ Server is already running. Start aborted.")
-        return
+        return None
 
-    if not os.path.exists(SETTINGS_PATH):
+    if not settings_store.exists():
         log("❌ Cannot find settings.json! Please verify RTM files first.")
-        return
-
-    try:
-        with open(SETTINGS_PATH, "r") as f:
-            settings = json.load(f)
-    except Exception as e:
-        log_error(f"[server_control] Failed to read settings.json: {e}")
-        log("❌ Failed to read settings.json.")
-        return
+        return None
 
-    server_dir = settings.get("rtm_server_path")
+    server_dir = instance.server_path
     if not server_dir:
         log("❌ RTM Server path not found in settings.json.")
-        return
+        return None
 
     server_exe = os.path.join(server_dir, "MoriaServer.exe")
     if not os.path.exists(server_exe):
         log(f"❌ Could not find MoriaServer.exe in: {server_dir}")
-        return
+        return None
+
+    if not server_config.check_before_start(instance, log):
+        return None
+
+    return server_dir, server_exe
+
+def update_server(instance, log, server_dir, validate=None):
+    if validate is None:
+        validate = steam_update.validation_due(server_dir)
+
+    if not validate and steam_update.apply_prestaged(log, server_dir):
+        return True
 
     log("🔄 Checking for updates via SteamCMD...")
-    QApplication.processEvents()
-    time.sleep(0.3)
+    if not validate and steam_update.is_up_to_date(log, server_dir):
+        build_id, _ = steam_update.get_installed_build(server_dir)
+        log(f"✅ Server is up to date (build {build_id}). Skipping SteamCMD update.")
+        return True
 
     notifications.send_terminal_webhook_desktop(
         log, "🔄 Server update in progress...", "Return to Moria Server", "Server is being updated."
     )
-    time.sleep(0.5)
-
-    update_command = [
-        STEAMCMD_EXE,
-        "+force_install_dir", server_dir,
-        "+login", "anonymous",
-        "+app_update", STEAM_APP_ID, "validate",
-        "+quit"
-    ]
+    if validate:
+        log("🔍 Running full SteamCMD file validation...")
 
-    try:
-        subprocess.run(update_command, check=True)
-        log("✅ Server updated.")
-    except Exception as e:
-        log_error(f"[server_control] SteamCMD update failed: {e}")
-        log(f"❌ SteamCMD update failed: {e}")
-        return
+    if not steam_update.run_update(log, server_dir, validate=validate):
+        return False
+    log("✅ Server updated.")
+    return True
 
+def launch_server(instance, log, server_dir, server_exe, on_exit=None):
     log("🚀 Launching Return to Moria server...")
-    QApplication.processEvents()
-    time.sleep(0.3)
 
     notifications.send_terminal_webhook_desktop(
         log, "🚀 Launching Return to Moria Dedicated Server...", "RTM Server Manager", "Server is launching."
     )
 
     try:
-        server_process = subprocess.Popen(
+        process = subprocess.Popen(
             [server_exe],
             cwd=server_dir,
             stdin=subprocess.PIPE,
@@ -96,58 +88,189 @@ def start_server(log):
             stderr=subprocess.STDOUT,
             text=True
         )
-        threading.Thread(target=read_server_output, args=(log,), daemon=True).start()
+        instance.process = process
+        server_config.remember_running(instance)
+        runtime_stats.mark_server_started(instance.id)
+        output_parser.reset(instance)
+        instance.recent_output.clear()
+        # One thread per running server: pipes can't be multiplexed portably (select()
+        # doesn't take pipes on Windows), so the reader also doubles as the exit watcher.
+        instance.reader = threading.Thread(
+            target=read_server_output, args=(instance, process, log, on_exit), daemon=True
+        )
+        instance.reader.start()
         log("✅ Server process started.")
-        log(f"🆔 PID: {server_process.pid}")
+        log(f"🆔 PID: {process.pid}")
+        return True
     except Exception as e:
         log_error(f"[server_control] Error starting server: {e}")
         log(f"❌ Error starting server: {e}")
+        return False
+
+# Shutdown escalates soft exit -> terminate -> kill. Each stage has its own deadline
+# (seconds); settings.json "shutdown" overrides any of them. Once the server logs its
+# shutdown marker it only gets after_shutdown_timeout more to actually exit.
+DEFAULT_SHUTDOWN = {
+    "exit_timeout": 60,
+    "after_shutdown_timeout": 15,
+    "terminate_timeout": 15,
+    "kill_timeout": 10,
+}
+_POLL_INTERVAL = 0.2
 
-def stop_server(log):
-    global server_process
+def shutdown_policy():
+    policy = dict(DEFAULT_SHUTDOWN)
+    policy.update(settings_store.get("shutdown", {}) or {})
+    return policy
 
-    if not is_server_running():
+def stop_server(instance, log):
+    # Returns True once the server process and its children are confirmed gone.
+    if not is_server_running(instance):
         log("⚠️ Server is not running.")
-        return
+        return True
 
     log("⏹ Sending shutdown to server...")
-    QApplication.processEvents()
-    time.sleep(0.3)
+    process = instance.process
+    children = _child_processes(process)
+    policy = shutdown_policy()
+    started = time.monotonic()
+    markers = _ShutdownMarkers(instance)
 
     try:
-        server_process.stdin.write("Exit\n")
-        server_process.stdin.flush()
+        stage = "exit"
         try:
-            server_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            log("⚠️ Server did not exit within timeout.")
-
-        if platform.system() == "Windows":
-            try:
-                subprocess.run(["taskkill", "/F", "/IM", "MoriaServer-Win64-Shipping.exe"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            except Exception as e:
-                log(f"⚠️ Failed to force kill process on Windows: {e}")
-        else:
-            try:
-                server_process.terminate()
-                server_process.wait(timeout=10)
-            except Exception as e:
-                log(f"⚠️ Failed to terminate server process on Linux/macOS: {e}")
-
-        server_process = None
-        log("✅ Server stopped successfully.")
+            process.stdin.write("Exit\n")
+            process.stdin.flush()
+        except (OSError, ValueError) as e:
+            log(f"⚠️ Could not send Exit to the server: {e}")
+        gone = _wait_for_exit(process, children, policy, markers, log)
+
+        if not gone:
+            stage = "terminate"
+            if not markers.saved.is_set():
+                log("⚠️ No world save was confirmed before the shutdown deadline.")
+            log(f"⚠️ Server did not exit cleanly; terminating (waiting up to {policy['terminate_timeout']}s).")
+            _signal_tree(process, children, kill=False)
+            gone = _wait_gone(process, children, policy["terminate_timeout"])
+
+        if not gone:
+            stage = "kill"
+            log(f"⚠️ Server ignored terminate; killing (waiting up to {policy['kill_timeout']}s).")
+            _signal_tree(process, children, kill=True)
+            gone = _wait_gone(process, children, policy["kill_timeout"])
     except Exception as e:
         log_error(f"[server_control] Error stopping server: {e}")
         log(f"❌ Error stopping server: {e}")
+        return False
+    finally:
+        markers.close()
 
-def read_server_output(log):
-    global server_process
-    if not server_process:
-        return
+    elapsed = time.monotonic() - started
+    if not gone:
+        log_error(f"[server_control] {instance.name} (PID {process.pid}) still running after kill.")
+        log("❌ Server could not be stopped; it is still running.")
+        return False
+
+    instance.process = None
+    runtime_stats.mark_server_stopped(instance.id)
+    runtime_stats.set_value("last_shutdown_seconds", elapsed, instance.id)
+    if stage != "exit":
+        runtime_stats.increment("forced_stops", instance_id=instance.id)
+        log(f"✅ Server stopped after {elapsed:.1f}s ({stage}).")
+    else:
+        log(f"✅ Server stopped cleanly in {elapsed:.1f}s.")
+    return True
+
+
+class _ShutdownMarkers:
+    # Watches this instance's parsed output for save / shutdown markers while it stops.
+    def __init__(self, instance):
+        self.instance_id = instance.id
+        self.saved = threading.Event()
+        self.shutdown = threading.Event()
+        event_bus.subscribe(event_bus.WORLD_SAVED, self._on_event)
+        event_bus.subscribe(event_bus.SERVER_SHUTDOWN, self._on_event)
+
+    def _on_event(self, event):
+        if event.data.get("instance", self.instance_id) != self.instance_id:
+            return
+        (self.saved if event.kind == event_bus.WORLD_SAVED else self.shutdown).set()
+
+    def close(self):
+        event_bus.unsubscribe(event_bus.WORLD_SAVED, self._on_event)
+        event_bus.unsubscribe(event_bus.SERVER_SHUTDOWN, self._on_event)
 
+def _wait_for_exit(process, children, policy, markers, log):
+    deadline = time.monotonic() + policy["exit_timeout"]
+    saved_logged = shutdown_logged = False
+    while True:
+        if not _tree_alive(process, children):
+            return True
+        now = time.monotonic()
+        if markers.saved.is_set() and not saved_logged:
+            saved_logged = True
+            log("💾 World save confirmed.")
+        if markers.shutdown.is_set() and not shutdown_logged:
+            shutdown_logged = True
+            log("⏳ Server is shutting down...")
+            deadline = min(deadline, now + policy["after_shutdown_timeout"])
+        if now >= deadline:
+            return False
+        time.sleep(_POLL_INTERVAL)
+
+def _wait_gone(process, children, timeout):
+    deadline = time.monotonic() + timeout
+    while _tree_alive(process, children):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(_POLL_INTERVAL)
+    return True
+
+def _tree_alive(process, children):
+    import psutil
+    if process.poll() is None:
+        return True
+    for child in children:
+        try:
+            if child.is_running() and child.status() != psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.Error:
+            pass
+    return False
+
+def _signal_tree(process, children, kill):
+    import psutil
+    # Children first: MoriaServer.exe is only a launcher for the -Shipping server.
+    for child in children:
+        try:
+            child.kill() if kill else child.terminate()
+        except psutil.Error:
+            pass
+    if process.poll() is None:
+        try:
+            process.kill() if kill else process.terminate()
+        except OSError:
+            pass
+
+def _child_processes(process):
+    # Captured before shutdown: MoriaServer.exe hands off to a -Shipping child, and killing
+    # by image name would take down every instance's server, not just this one.
+    import psutil
     try:
-        for line in server_process.stdout:
+        return psutil.Process(process.pid).children(recursive=True)
+    except psutil.Error:
+        return []
+
+def read_server_output(instance, process, log, on_exit=None):
+    try:
+        for line in process.stdout:
             if line:
-                log(f"[SERVER] {line.strip()}")
+                line = line.strip()
+                log(f"[SERVER] {line}")
+                instance.recent_output.append(line)
+                output_parser.feed(line, instance)
     except Exception as e:
         log_error(f"[server_control] Error reading server output: {e}")
+
+    if on_exit:
+        on_exit(instance, process, process.wait(), log)
@@ -1,11 +1,10 @@
 import os
 import sys
 import shutil
-import json
 import subprocess
 import platform
+from modules import settings_store, instances
 from modules.logger import log_error
-from modules.config import SETTINGS_PATH
 
 
 if getattr(sys, 'frozen', False):
@@ -16,17 +15,10 @@ else:
 DEFAULT_FILES_DIR = os.path.join(BASE_DIR, "Default Files")
 
 def _get_rtm_path(log):
-    if not os.path.exists(SETTINGS_PATH):
+    if not settings_store.exists():
         log("❌ settings.json not found. Please verify RTM files first.")
         return None
-    try:
-        with open(SETTINGS_PATH, "r") as f:
-            settings = json.load(f)
-            return settings.get("rtm_server_path")
-    except Exception as e:
-        log_error(f"[server_settings] Failed to read settings.json: {e}")
-        log("❌ Failed to read settings.json.")
-        return None
+    return instances.active().server_path
 
 def _open_editor(path, log):
     try:
@@ -69,6 +61,10 @@ def _check_or_copy(file_name, log):
             return None
     return file_path
 
+def prepare_config_file(log):
+    # Path to the active instance's config, copying the default in if it's missing.
+    return _check_or_copy("MoriaServerConfig.ini", log)
+
 def open_config_editor(log):
     path = _check_or_copy("MoriaServerConfig.ini", log)
     if path:
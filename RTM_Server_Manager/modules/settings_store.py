@@ -0,0 +1,106 @@
+import os
+import json
+import copy
+import tempfile
+import threading
+from modules.logger import log_error
+from modules.config import SETTINGS_PATH
+
+# Process-wide settings.json cache.
+# Reads are served from memory and only re-parse the file when its mtime changes;
+# writes go through one lock and are saved atomically (temp file + rename).
+
+_lock = threading.RLock()
+_cache = {}
+_mtime = None
+_subscribers = []
+
+def _refresh():
+    global _cache, _mtime
+    try:
+        mtime = os.stat(SETTINGS_PATH).st_mtime_ns
+    except FileNotFoundError:
+        if _mtime is not None:
+            _cache, _mtime = {}, None
+        return set()
+    if mtime == _mtime:
+        return set()
+
+    try:
+        with open(SETTINGS_PATH, "r") as f:
+            data = json.load(f)
+    except Exception as e:
+        log_error(f"[settings_store] Failed to read settings.json: {e}")
+        return set()
+
+    changed = _changed_keys(_cache, data) if _mtime is not None else set()
+    _cache, _mtime = data, mtime
+    return changed
+
+def _changed_keys(old, new):
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+def _write(data):
+    global _mtime
+    directory = os.path.dirname(SETTINGS_PATH)
+    fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, SETTINGS_PATH)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _mtime = os.stat(SETTINGS_PATH).st_mtime_ns
+
+def _notify(changed):
+    if not changed:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(changed)
+        except Exception as e:
+            log_error(f"[settings_store] Subscriber failed: {e}")
+
+def exists():
+    return os.path.exists(SETTINGS_PATH)
+
+def load():
+    with _lock:
+        changed = _refresh()
+        data = copy.deepcopy(_cache)
+    _notify(changed)
+    return data
+
+def get(key, default=None):
+    with _lock:
+        changed = _refresh()
+        value = copy.deepcopy(_cache.get(key, default))
+    _notify(changed)
+    return value
+
+def update(values):
+    global _cache
+    with _lock:
+        changed = _refresh()
+        data = copy.deepcopy(_cache)
+        data.update(copy.deepcopy(values))
+        changed |= _changed_keys(_cache, data)
+        if data != _cache or not exists():
+            _write(data)
+            _cache = data
+    _notify(changed)
+
+def set_value(key, value):
+    update({key: value})
+
+def subscribe(callback):
+    # callback(changed_keys) runs on the thread that saved or first noticed the change.
+    _subscribers.append(callback)
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
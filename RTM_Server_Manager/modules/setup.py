@@ -2,13 +2,13 @@ import os
 import sys
 import zipfile
 import subprocess
-import json
 import platform
+import threading
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtCore import QTimer
 from urllib.request import urlretrieve
+from modules import steam_update, instances
 from modules.logger import log_error
-from modules.config import SETTINGS_PATH
 
 
 if getattr(sys, 'frozen', False):
@@ -58,15 +58,7 @@ def verify_rtm_files(log):
         log("❌ SteamCMD is not available. Please verify SteamCMD first.")
         return
 
-    install_dir = None
-    if os.path.exists(SETTINGS_PATH):
-        try:
-            with open(SETTINGS_PATH, "r") as f:
-                settings = json.load(f)
-                install_dir = settings.get("rtm_server_path")
-        except Exception as e:
-            log_error(f"[setup] Failed to read settings.json: {e}")
-            log("⚠️ Failed to read settings.json.")
+    install_dir = instances.active().server_path
 
     if not install_dir or not os.path.isdir(install_dir):
         log("📁 No RTM server directory found. Please select or create one.")
@@ -83,8 +75,7 @@ def _select_rtm_path(log):
         return
 
     try:
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump({"rtm_server_path": selected}, f, indent=4)
+        instances.active().set_setting("rtm_server_path", selected)
         log(f"✅ Saved RTM install location to settings.json: {selected}")
         log(f"🔄 Installing/updating Return to Moria server at: {selected}")
         QTimer.singleShot(200, lambda: _run_steamcmd_update(log, selected))
@@ -93,21 +84,13 @@ def _select_rtm_path(log):
         log("❌ Failed to save RTM install location.")
 
 def _run_steamcmd_update(log, install_dir):
-    try:
-        result = subprocess.run([
-            steamcmd_exe,
-            "+force_install_dir", install_dir,
-            "+login", "anonymous",
-            "+app_update", "3349480", "validate",
-            "+quit"
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # SteamCMD output is streamed by steam_update, so run it off the GUI thread.
+    threading.Thread(target=_install_or_update, args=(log, install_dir), daemon=True).start()
 
-        output = result.stdout + result.stderr
-        if "Success! App '3349480'" in output:
+def _install_or_update(log, install_dir):
+    try:
+        if steam_update.run_update(log, install_dir, validate=True):
             log("✅ RTM server installed/updated successfully.")
-        else:
-            log("⚠️ SteamCMD completed, but success message not found.")
-            log_error("[setup] Output:\n" + output)
     except Exception as e:
         log_error(f"[setup] RTM update/install failed: {e}")
         log("❌ RTM server update failed.")
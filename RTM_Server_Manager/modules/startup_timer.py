@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import threading
+
+# Startup timing for main.py: named phases are always recorded (a perf_counter call
+# each); per-module import times are only collected when RTM_STARTUP_TIMING=1 or
+# --startup-timing is given, because that wraps every loader on the import path.
+# report() returns the lines main.py prints to the terminal once the window is up.
+
+ENV_FLAG = "RTM_STARTUP_TIMING"
+CLI_FLAG = "--startup-timing"
+TOP_IMPORTS = 15
+
+_started = time.perf_counter()
+_phases = []          # (name, seconds)
+_phase_start = _started
+_imports = {}         # module name -> [self seconds, cumulative seconds]
+_stack = threading.local()
+_enabled = False
+
+
+class _TimingFinder:
+    # Wraps create/exec_module on the loaders other finders return; never loads anything itself.
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Builtin/frozen importers are classes shared by every module; leave them be.
+            # Extension modules do their work in create_module, so both are timed.
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+                loader.exec_module = _timed(name, loader.exec_module)
+                if hasattr(loader, "create_module"):
+                    loader.create_module = _timed(name, loader.create_module)
+            return spec
+        return None
+
+def _timed(name, step):
+    def wrapper(arg):
+        frames = getattr(_stack, "frames", None)
+        if frames is None:
+            frames = _stack.frames = []
+        frames.append(0.0)
+        started = time.perf_counter()
+        try:
+            return step(arg)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = frames.pop()
+            if frames:
+                frames[-1] += elapsed
+            totals = _imports.setdefault(name, [0.0, 0.0])
+            totals[0] += elapsed - nested
+            totals[1] += elapsed
+    return wrapper
+
+def enable_import_timing():
+    global _enabled
+    if not _enabled:
+        _enabled = True
+        sys.meta_path.insert(0, _TimingFinder())
+
+def phase(name):
+    # Closes the phase that ran since the previous call (or process start).
+    global _phase_start
+    now = time.perf_counter()
+    _phases.append((name, now - _phase_start))
+    _phase_start = now
+
+def total():
+    return time.perf_counter() - _started
+
+def report():
+    lines = [f"⏱️ Startup took {total():.2f}s: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in _phases)]
+    if _imports:
+        slowest = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)[:TOP_IMPORTS]
+        lines.append(f"⏱️ Slowest imports (cumulative / self), {len(_imports)} modules timed:")
+        for name, (own, cumulative) in slowest:
+            lines.append(f"    {cumulative * 1000:7.1f} / {own * 1000:6.1f} ms  {name}")
+    return lines
+
+if os.environ.get(ENV_FLAG) == "1" or CLI_FLAG in sys.argv:
+    enable_import_timing()
@@ -0,0 +1,352 @@
+import os
+import sys
+import re
+import shutil
+import hashlib
+import time
+import subprocess
+import platform
+import threading
+from datetime import datetime, timedelta
+from modules import settings_store, runtime_stats, instances, install_sync, steamcmd_runner
+from modules.logger import log_error
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+STEAMCMD_DIR = os.path.join(BASE_DIR, "steamcmd")
+STEAMCMD_EXE = os.path.join(STEAMCMD_DIR, "steamcmd.exe" if platform.system() == "Windows" else "steamcmd.sh")
+STEAM_APP_ID = "3349480"
+
+DEFAULT_VALIDATE_INTERVAL_DAYS = 7
+DEFAULT_STAGING_DIR = os.path.join(BASE_DIR, "rtm_staging")
+PRESTAGE_DIR = os.path.join(BASE_DIR, "rtm_prestage")
+PRESTAGE_TTL = 6 * 60 * 60  # seconds a pre-staged build is trusted without asking Steam again
+REMOTE_BUILD_TTL = 60  # seconds a fetched public build id is reused across instances
+STATE_FULLY_INSTALLED = 4
+
+_VDF_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])')
+_validate_requested = set()
+# SteamCMD shares one install and login cache, so instances take turns running it;
+# whole update passes (staging + sync) are serialised by _update_lock on top of that.
+_steamcmd_lock = threading.Lock()
+_update_lock = threading.Lock()
+_remote_build = (0.0, None)
+_prestaged = {}  # record key -> {"build_id", "source", "shared", "staged_at"}
+
+def parse_vdf(text):
+    # Minimal KeyValues parser for Steam .acf manifests and app_info_print output.
+    root = {}
+    stack = [root]
+    key = None
+    for quoted, brace in _VDF_TOKEN.findall(text):
+        if brace == "{":
+            child = {}
+            stack[-1][key if key is not None else ""] = child
+            stack.append(child)
+            key = None
+        elif brace == "}":
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        elif key is None:
+            key = quoted
+        else:
+            stack[-1][key] = quoted
+            key = None
+    return root
+
+def manifest_path(install_dir):
+    return os.path.join(install_dir, "steamapps", f"appmanifest_{STEAM_APP_ID}.acf")
+
+def read_app_manifest(install_dir):
+    path = manifest_path(install_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_vdf(f.read()).get("AppState")
+    except Exception as e:
+        log_error(f"[steam_update] Failed to read {path}: {e}")
+        return None
+
+def get_installed_build(install_dir):
+    manifest = read_app_manifest(install_dir)
+    if not manifest:
+        return None, {}
+    if manifest.get("StateFlags") != str(STATE_FULLY_INSTALLED):
+        return None, {}
+    depots = {
+        depot: info.get("manifest", "")
+        for depot, info in manifest.get("InstalledDepots", {}).items()
+        if isinstance(info, dict)
+    }
+    return manifest.get("buildid"), depots
+
+def get_remote_build(log):
+    global _remote_build
+    fetched_at, build_id = _remote_build
+    if build_id and time.monotonic() - fetched_at < REMOTE_BUILD_TTL:
+        return build_id
+    build_id = _fetch_remote_build(log)
+    if build_id:
+        _remote_build = (time.monotonic(), build_id)
+    return build_id
+
+def _fetch_remote_build(log):
+    # Fetches only the app info (no file hashing) to learn the current public build ID.
+    command = [
+        STEAMCMD_EXE,
+        "+login", "anonymous",
+        "+app_info_update", "1",
+        "+app_info_print", STEAM_APP_ID,
+        "+quit"
+    ]
+    try:
+        with _steamcmd_lock:
+            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=120)
+    except Exception as e:
+        log_error(f"[steam_update] app_info_print failed: {e}")
+        return None
+
+    start = result.stdout.find(f'"{STEAM_APP_ID}"')
+    if start == -1:
+        log_error("[steam_update] app_info_print returned no app info.")
+        return None
+    info = parse_vdf(result.stdout[start:]).get(STEAM_APP_ID, {})
+    return info.get("depots", {}).get("branches", {}).get("public", {}).get("buildid")
+
+def _record_key(install_dir):
+    return os.path.normcase(os.path.abspath(install_dir or ""))
+
+def _build_records():
+    records = settings_store.get("steam_build", {}) or {}
+    if "build_id" in records or "last_validate" in records:
+        # Single-install layout from before multi-instance support.
+        records = {_record_key(settings_store.get("rtm_server_path")): records}
+    return records
+
+def _build_record(install_dir):
+    return _build_records().get(_record_key(install_dir), {})
+
+def request_validation(install_dir):
+    _validate_requested.add(_record_key(install_dir))
+
+def validation_due(install_dir):
+    if _record_key(install_dir) in _validate_requested:
+        return True
+    interval = settings_store.get("validate_interval_days", DEFAULT_VALIDATE_INTERVAL_DAYS)
+    if not interval:
+        return False
+    last = _build_record(install_dir).get("last_validate")
+    if not last:
+        return True
+    try:
+        return datetime.now() - datetime.strptime(last, "%Y-%m-%d %H:%M:%S") >= timedelta(days=interval)
+    except ValueError:
+        return True
+
+def is_up_to_date(log, install_dir):
+    local_build, depots = get_installed_build(install_dir)
+    if not local_build:
+        return False
+
+    recorded = _build_record(install_dir)
+    if recorded.get("build_id") != local_build or recorded.get("depots") != depots:
+        # The install changed outside the manager; let SteamCMD reconcile it.
+        return False
+
+    remote_build = get_remote_build(log)
+    if not remote_build:
+        return False
+    return remote_build == local_build
+
+def record_installed(install_dir, validated=False):
+    build_id, depots = get_installed_build(install_dir)
+    key = _record_key(install_dir)
+    try:
+        records = _build_records()
+        record = records.setdefault(key, {})
+        record["build_id"] = build_id
+        record["depots"] = depots
+        if validated:
+            record["last_validate"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            _validate_requested.discard(key)
+        settings_store.set_value("steam_build", records)
+    except Exception as e:
+        log_error(f"[steam_update] Failed to record installed build: {e}")
+
+def staging_settings():
+    config = {"enabled": None, "path": DEFAULT_STAGING_DIR, "link_mode": install_sync.LINK_AUTO}
+    config.update(settings_store.get("shared_staging", {}) or {})
+    return config
+
+def staging_enabled():
+    enabled = staging_settings()["enabled"]
+    if enabled is None:
+        # Unset means automatic: worth it once two installs would fetch the same depot.
+        paths = {_record_key(instance.server_path) for instance in instances.list_instances() if instance.server_path}
+        return len(paths) > 1
+    return bool(enabled)
+
+def run_update(log, install_dir, validate=False):
+    started = time.monotonic()
+    try:
+        with _update_lock:
+            if staging_enabled():
+                ok = _update_via_staging(log, install_dir, validate)
+            else:
+                ok = _run_steamcmd(log, install_dir, validate)
+    finally:
+        runtime_stats.set_value("last_update_seconds", time.monotonic() - started)
+
+    if ok:
+        record_installed(install_dir, validated=validate)
+    return ok
+
+def _run_steamcmd(log, install_dir, validate):
+    command = [
+        STEAMCMD_EXE,
+        "+force_install_dir", install_dir,
+        "+login", "anonymous",
+        "+app_update", STEAM_APP_ID
+    ]
+    if validate:
+        command.append("validate")
+    command.append("+quit")
+
+    with _steamcmd_lock:
+        return steamcmd_runner.run(command, log, install_dir)
+
+def _update_via_staging(log, install_dir, validate):
+    # One SteamCMD pass into the shared staging install, then a sync of only the changed
+    # files into this instance. Later instances find staging current and only sync.
+    config = staging_settings()
+    staging = config["path"]
+
+    local_build, _ = get_installed_build(staging)
+    if validate or not local_build or local_build != get_remote_build(log):
+        log(f"📦 Updating shared staging install at {staging}...")
+        if not _run_steamcmd(log, staging, validate):
+            return False
+        record_installed(staging, validated=validate)
+    else:
+        log(f"📦 Shared staging install already has build {local_build}.")
+
+    log(f"🔗 Syncing {install_dir} from staging...")
+    try:
+        result = install_sync.sync_tree(staging, install_dir, config["link_mode"], verify=validate)
+    except OSError as e:
+        log_error(f"[steam_update] Sync from staging to {install_dir} failed: {e}")
+        log(f"❌ Sync from staging failed: {e}")
+        return False
+    log(f"✅ Sync complete: {result.summary()}")
+    return True
+
+# Pre-staging: ahead of a scheduled restart the new build is downloaded next to the
+# running server (into shared staging, or a private side directory seeded from the
+# install), so the restart itself only has to sync the changed files and launch.
+
+def _prestage_dir(install_dir):
+    key = _record_key(install_dir)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(PRESTAGE_DIR, f"{os.path.basename(key.rstrip(os.sep)) or 'server'}-{digest}")
+
+def prestage_update(log, install_dir):
+    # Returns True when a newer build is ready to be applied at the next start.
+    remote_build = get_remote_build(log)
+    local_build, _ = get_installed_build(install_dir)
+    if not remote_build:
+        log("⚠️ Could not reach Steam; the update will run at restart instead.")
+        return False
+    if remote_build == local_build:
+        log(f"✅ Build {local_build} is current; nothing to pre-stage.")
+        _prestaged.pop(_record_key(install_dir), None)
+        return False
+
+    started = time.monotonic()
+    log(f"📥 Pre-staging build {remote_build} while the server keeps running...")
+    with _update_lock:
+        if staging_enabled():
+            source, shared = staging_settings()["path"], True
+            if get_installed_build(source)[0] != remote_build and not _prestage_shared(log, source):
+                return False
+        else:
+            source, shared = _prestage_dir(install_dir), False
+            try:
+                # Cloned, never hardlinked: SteamCMD may patch files in place and must not
+                # touch the ones the running server is using.
+                install_sync.sync_tree(install_dir, source, install_sync.LINK_CLONE)
+            except OSError as e:
+                log_error(f"[steam_update] Seeding pre-stage directory {source} failed: {e}")
+                log(f"❌ Pre-staging failed: {e}")
+                return False
+            if not _run_steamcmd(log, source, False):
+                return False
+
+    build_id, _ = get_installed_build(source)
+    if build_id != remote_build:
+        log(f"⚠️ Pre-staged install reports build {build_id}, expected {remote_build}.")
+        return False
+    _prestaged[_record_key(install_dir)] = {
+        "build_id": build_id, "source": source, "shared": shared, "staged_at": time.monotonic()
+    }
+    log(f"✅ Build {build_id} pre-staged in {time.monotonic() - started:.0f}s; it will be applied at restart.")
+    return True
+
+def _prestage_shared(log, staging):
+    # Servers are live during the warning window. Their files only share inodes with
+    # staging in the opt-in hardlink mode; then SteamCMD runs on a clone of staging and
+    # the result is synced back, which replaces files (new inodes) instead of patching them.
+    if staging_settings()["link_mode"] != install_sync.LINK_HARDLINK:
+        if not _run_steamcmd(log, staging, False):
+            return False
+        record_installed(staging)
+        return True
+
+    side = _prestage_dir(staging)
+    try:
+        install_sync.sync_tree(staging, side, install_sync.LINK_CLONE)
+        if not _run_steamcmd(log, side, False):
+            return False
+        # Hashed: a file patched within the same second keeps its size and mtime.
+        install_sync.sync_tree(side, staging, install_sync.LINK_CLONE, verify=True)
+    except OSError as e:
+        log_error(f"[steam_update] Pre-staging shared staging via {side} failed: {e}")
+        log(f"❌ Pre-staging failed: {e}")
+        return False
+    finally:
+        threading.Thread(target=shutil.rmtree, args=(side, True), daemon=True).start()
+    record_installed(staging)
+    return True
+
+def apply_prestaged(log, install_dir):
+    # Fast path for a start after prestage_update: sync only, no SteamCMD run.
+    # Returns False when there is nothing usable, so the caller falls back to run_update.
+    key = _record_key(install_dir)
+    entry = _prestaged.pop(key, None)
+    if not entry or time.monotonic() - entry["staged_at"] > PRESTAGE_TTL:
+        return False
+    if get_installed_build(entry["source"])[0] != entry["build_id"]:
+        return False
+
+    started = time.monotonic()
+    mode = staging_settings()["link_mode"] if entry["shared"] else install_sync.LINK_AUTO
+    try:
+        with _update_lock:
+            result = install_sync.sync_tree(entry["source"], install_dir, mode)
+    except OSError as e:
+        log_error(f"[steam_update] Applying pre-staged build to {install_dir} failed: {e}")
+        log(f"⚠️ Applying the pre-staged build failed ({e}); running a normal update.")
+        return False
+
+    record_installed(install_dir)
+    elapsed = time.monotonic() - started
+    runtime_stats.set_value("last_update_seconds", elapsed)
+    log(f"⚡ Applied pre-staged build {entry['build_id']} in {elapsed:.1f}s: {result.summary()}")
+    if not entry["shared"]:
+        # The install now has its own copies/links, so the side directory can go.
+        threading.Thread(target=shutil.rmtree, args=(entry["source"], True), daemon=True).start()
+    return True
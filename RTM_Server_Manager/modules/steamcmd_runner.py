@@ -0,0 +1,191 @@
+import re
+import time
+import queue
+import threading
+import subprocess
+from collections import deque, namedtuple
+from modules.logger import log_error
+
+# Runs a SteamCMD app_update with its output streamed instead of buffered.
+# A reader thread turns stdout into lines on a queue; the calling thread parses
+# "Update state (...) <state>, progress: <pct> (<done> / <total>)" lines into
+# UpdateProgress, reports them to listeners and the log, watches for stalls and
+# honours cancel(). Only the last TAIL_LINES lines are kept.
+
+TAIL_LINES = 50
+LOG_INTERVAL = 15        # seconds between progress lines in the terminal
+NOTIFY_INTERVAL = 0.5    # seconds between listener updates
+STALL_SECONDS = 120
+CANCEL_GRACE = 10         # seconds before a cancelled SteamCMD is killed
+_RATE_SMOOTHING = 0.3
+
+_PROGRESS = re.compile(
+    r"Update state \(0x[0-9a-fA-F]+\) (?P<state>[^,]+), progress: (?P<percent>[\d.]+) \((?P<done>\d+) / (?P<total>\d+)\)"
+)
+_SUCCESS = re.compile(r"Success! App '\d+'")
+_ERROR = re.compile(r"^ERROR!|Error! App '\d+'")
+
+UpdateProgress = namedtuple("UpdateProgress", ["install_dir", "state", "percent", "done", "total", "rate", "eta"])
+
+_listeners = []
+_cancel = threading.Event()
+_current = None
+
+def add_progress_listener(callback):
+    # callback(progress) on the updating thread; progress is None once SteamCMD exits.
+    _listeners.append(callback)
+
+def remove_progress_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def is_running():
+    return _current is not None
+
+def cancel():
+    if _current is not None:
+        _cancel.set()
+        return True
+    return False
+
+def format_progress(progress):
+    text = f"{progress.state} {progress.percent:.1f}%"
+    if progress.total:
+        text += f" ({progress.done / 1024 ** 2:.0f} / {progress.total / 1024 ** 2:.0f} MB)"
+    if progress.rate:
+        text += f" at {progress.rate / 1024 ** 2:.1f} MB/s"
+    if progress.eta is not None:
+        minutes, seconds = divmod(int(progress.eta), 60)
+        text += f", ~{minutes}m{seconds:02d}s left"
+    return text
+
+def _notify(progress):
+    for callback in list(_listeners):
+        try:
+            callback(progress)
+        except Exception as e:
+            log_error(f"[steamcmd_runner] Progress listener failed: {e}")
+
+def _signal_tree(process, kill=False):
+    # steamcmd.sh runs the real client as a child, so signal the whole tree.
+    import psutil
+    try:
+        targets = psutil.Process(process.pid).children(recursive=True)
+    except psutil.Error:
+        targets = []
+    for target in targets:
+        try:
+            target.kill() if kill else target.terminate()
+        except psutil.Error:
+            pass
+    try:
+        process.kill() if kill else process.terminate()
+    except OSError:
+        pass
+
+def _read_lines(stream, lines):
+    try:
+        for line in stream:
+            lines.put(line.rstrip())
+    finally:
+        lines.put(None)
+
+def run(command, log, install_dir):
+    # Returns True when SteamCMD reports success (or exits 0 without an error line).
+    global _current
+    _cancel.clear()
+    try:
+        process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors="replace"
+        )
+    except Exception as e:
+        log_error(f"[steamcmd_runner] Failed to launch SteamCMD: {e}")
+        log(f"❌ Failed to launch SteamCMD: {e}")
+        return False
+
+    _current = process
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+
+    tail = deque(maxlen=TAIL_LINES)
+    succeeded = failed = cancelled = False
+    progress = None
+    rate = None
+    last_sample = None          # (monotonic time, bytes done)
+    last_change = time.monotonic()
+    last_logged = last_notified = 0.0
+    stall_warned = False
+    cancelled_at = None
+
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=1)
+            except queue.Empty:
+                line = ""
+            now = time.monotonic()
+
+            if _cancel.is_set() and not cancelled:
+                cancelled = True
+                cancelled_at = now
+                log("⏹ Cancelling SteamCMD update...")
+                _signal_tree(process)
+            elif cancelled_at and now - cancelled_at >= CANCEL_GRACE:
+                cancelled_at = None
+                _signal_tree(process, kill=True)
+            if line is None:
+                break
+
+            if line:
+                tail.append(line)
+                match = _PROGRESS.search(line)
+                if match:
+                    done, total = int(match["done"]), int(match["total"])
+                    if last_sample and done != last_sample[1] and now > last_sample[0]:
+                        sample_rate = max(0.0, (done - last_sample[1]) / (now - last_sample[0]))
+                        rate = sample_rate if rate is None else rate + _RATE_SMOOTHING * (sample_rate - rate)
+                    state = match["state"].strip()
+                    if not last_sample or done != last_sample[1] or (progress and state != progress.state):
+                        last_change = now
+                        stall_warned = False
+                        if progress and state != progress.state:
+                            rate = None
+                    last_sample = (now, done)
+                    eta = (total - done) / rate if rate and total > done else None
+                    progress = UpdateProgress(install_dir, state, float(match["percent"]), done, total, rate, eta)
+
+                    if now - last_notified >= NOTIFY_INTERVAL or done == total:
+                        last_notified = now
+                        _notify(progress)
+                    if now - last_logged >= LOG_INTERVAL:
+                        last_logged = now
+                        log(f"⬇️ SteamCMD: {format_progress(progress)}")
+                else:
+                    if _SUCCESS.search(line):
+                        succeeded = True
+                    elif _ERROR.search(line):
+                        failed = True
+                    log(f"[STEAMCMD] {line}")
+
+            if not stall_warned and now - last_change >= STALL_SECONDS:
+                stall_warned = True
+                log(f"⚠️ SteamCMD has made no progress for {STALL_SECONDS // 60} minutes. It may be stuck; use Cancel to abort.")
+
+        try:
+            exit_code = process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            exit_code = process.wait()
+    finally:
+        _current = None
+        _notify(None)
+
+    if cancelled:
+        log("⏹ SteamCMD update cancelled.")
+        return False
+    if succeeded or (exit_code == 0 and not failed):
+        return True
+    log_error(f"[steamcmd_runner] SteamCMD exited with code {exit_code}. Last output:\n" + "\n".join(tail))
+    log(f"❌ SteamCMD update failed (exit code {exit_code}).")
+    return False
@@ -0,0 +1,255 @@
+import time
+import queue
+import threading
+from modules import server_control, steam_update, runtime_stats, event_bus, notifications, settings_store, instances, server_config
+from modules.logger import log_error
+
+# Lifecycle states reported to listeners.
+STATE_STOPPED = "stopped"
+STATE_UPDATING = "updating"
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_STOPPING = "stopping"
+STATE_CRASHED = "crashed"
+
+# Commands are queued per instance and run in order for that instance; a small shared
+# pool drains the queues, so instances don't wait on each other's updates and the
+# thread count doesn't grow with the number of instances.
+MAX_WORKERS = 4
+
+_ready = queue.Queue()  # instances with queued commands and no worker yet
+_workers = []
+_idle_workers = 0
+_queue_lock = threading.Lock()
+_state_lock = threading.Lock()
+_listeners = []
+
+# Crash recovery: restart after base_delay * 2^(crashes in window - 1), capped at
+# max_delay, and stop retrying once max_crashes happen inside window_minutes.
+DEFAULT_CRASH_RESTART = {
+    "enabled": True,
+    "base_delay": 5,
+    "max_delay": 300,
+    "max_crashes": 5,
+    "window_minutes": 15,
+}
+
+def get_state(instance=None):
+    return (instance or instances.active()).state
+
+def add_state_listener(callback):
+    # callback(instance, state)
+    _listeners.append(callback)
+
+def remove_state_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def submit(command, log, instance=None):
+    # Queues a lifecycle command for an instance (the active one by default) and returns
+    # immediately. The returned Event is set once the command has been fully processed.
+    if command not in _HANDLERS:
+        raise ValueError(f"Unknown supervisor command: {command}")
+
+    instance = instance or instances.active()
+    done = threading.Event()
+    with _queue_lock:
+        instance.commands.append((command, instance.tag(log), done))
+        if instance.busy:
+            return done
+        instance.busy = True
+        _ensure_worker()
+    _ready.put(instance)
+    return done
+
+def _ensure_worker():
+    # Called with _queue_lock held; grows the pool only while every worker is busy.
+    global _workers
+    _workers = [worker for worker in _workers if worker.is_alive()]
+    if _idle_workers or len(_workers) >= MAX_WORKERS:
+        return
+    worker = threading.Thread(target=_worker_loop, daemon=True)
+    _workers.append(worker)
+    worker.start()
+
+def _worker_loop():
+    global _idle_workers
+    while True:
+        with _queue_lock:
+            _idle_workers += 1
+        instance = _ready.get()
+        with _queue_lock:
+            _idle_workers -= 1
+        _drain(instance)
+
+def _drain(instance):
+    while True:
+        with _queue_lock:
+            if not instance.commands:
+                instance.busy = False
+                return
+            command, log, done = instance.commands.popleft()
+        try:
+            _HANDLERS[command](instance, log)
+        except Exception as e:
+            log_error(f"[supervisor] Command '{command}' for {instance.name} failed: {e}")
+            log(f"❌ Server {command} failed: {e}")
+        finally:
+            done.set()
+
+def _set_state(instance, state, only_from=None):
+    # only_from makes the transition conditional, so the exit watcher and the
+    # command worker can't overwrite each other's newer state.
+    with _state_lock:
+        if instance.state == state or (only_from and instance.state not in only_from):
+            return False
+        instance.state = state
+    for callback in list(_listeners):
+        try:
+            callback(instance, state)
+        except Exception as e:
+            log_error(f"[supervisor] State listener failed: {e}")
+    return True
+
+def _sync_state(instance):
+    _set_state(instance, STATE_RUNNING if server_control.is_server_running(instance) else STATE_STOPPED)
+
+def _on_exit(instance, process, exit_code, log):
+    # Called by the instance's output reader once the process has exited.
+    expected = process is instance.stopping_process
+    event_bus.publish(event_bus.SERVER_EXITED, {"instance": instance.id, "exit_code": exit_code, "expected": expected})
+    if not expected:
+        _on_crash(instance, exit_code, log)
+
+def _on_crash(instance, exit_code, log):
+    runtime_stats.mark_server_stopped(instance.id)
+    runtime_stats.increment("crashes", instance_id=instance.id)
+    instance.last_crash = {
+        "time": time.time(),
+        "exit_code": exit_code,
+        "output": list(instance.recent_output),
+    }
+    _set_state(instance, STATE_CRASHED)
+
+    log_error(f"[supervisor] {instance.name} crashed with exit code {exit_code}. Last output:\n" + "\n".join(instance.last_crash["output"]))
+    message = f"💥 RTM Server crashed (exit code {exit_code})."
+    if settings_store.get("notify_crash_detect", True):
+        notifications.send_terminal_webhook_desktop(log, message, "RTM Server Manager", message)
+    else:
+        log(message)
+
+    _schedule_crash_restart(instance, log)
+
+def _crash_policy():
+    policy = dict(DEFAULT_CRASH_RESTART)
+    policy.update(settings_store.get("crash_restart", {}) or {})
+    return policy
+
+def _schedule_crash_restart(instance, log):
+    policy = _crash_policy()
+    if not policy["enabled"]:
+        return
+
+    now = time.monotonic()
+    instance.crash_times.append(now)
+    while instance.crash_times and now - instance.crash_times[0] > policy["window_minutes"] * 60:
+        instance.crash_times.popleft()
+
+    crashes = len(instance.crash_times)
+    if crashes >= policy["max_crashes"]:
+        message = f"🛑 {crashes} crashes in {policy['window_minutes']} minutes. Automatic restarts paused; start the server manually."
+        notifications.send_terminal_webhook_desktop(log, message, "RTM Server Manager", message)
+        return
+
+    delay = min(policy["base_delay"] * 2 ** (crashes - 1), policy["max_delay"])
+    log(f"♻️ Restarting crashed server in {delay:.0f}s (attempt {crashes}/{policy['max_crashes'] - 1}).")
+    instance.restart_timer = threading.Timer(delay, _crash_restart, args=(instance, log))
+    instance.restart_timer.daemon = True
+    instance.restart_timer.start()
+
+def _crash_restart(instance, log):
+    if instance.state == STATE_CRASHED:
+        submit("recover", log, instance)
+
+def _cancel_crash_restart(instance):
+    if instance.restart_timer:
+        instance.restart_timer.cancel()
+        instance.restart_timer = None
+
+def _handle_start(instance, log):
+    # A manual start closes the crash-loop breaker.
+    _cancel_crash_restart(instance)
+    instance.crash_times.clear()
+    _start(instance, log)
+
+def _handle_recover(instance, log):
+    if instance.state == STATE_CRASHED:
+        _start(instance, log)
+
+def _start(instance, log):
+    target = server_control.prepare_start(instance, log)
+    if not target:
+        _sync_state(instance)
+        return
+    server_dir, server_exe = target
+
+    _set_state(instance, STATE_UPDATING)
+    if not server_control.update_server(instance, log, server_dir):
+        _set_state(instance, STATE_STOPPED)
+        return
+
+    _set_state(instance, STATE_STARTING)
+    if server_control.launch_server(instance, log, server_dir, server_exe, on_exit=_on_exit):
+        _set_state(instance, STATE_RUNNING, only_from=(STATE_STARTING,))
+    else:
+        _set_state(instance, STATE_STOPPED)
+
+def _handle_stop(instance, log):
+    _cancel_crash_restart(instance)
+    if server_control.is_server_running(instance):
+        instance.stopping_process = instance.process
+        _set_state(instance, STATE_STOPPING)
+    stopped = server_control.stop_server(instance, log)
+    _sync_state(instance)
+    return stopped
+
+def _handle_validate(instance, log):
+    if server_control.is_server_running(instance):
+        steam_update.request_validation(instance.server_path)
+        log("🔍 Full file validation will run on the next server start.")
+        return
+
+    target = server_control.prepare_start(instance, log)
+    if not target:
+        return
+    _set_state(instance, STATE_UPDATING)
+    server_control.update_server(instance, log, target[0], validate=True)
+    _sync_state(instance)
+
+def _handle_prestage(instance, log):
+    # Runs while the server is up; no state change, the restart queued behind it applies it.
+    if instance.server_path:
+        steam_update.prestage_update(log, instance.server_path)
+
+def _handle_restart(instance, log):
+    # Checked before stopping, so a bad edit doesn't cost a stop/update/start cycle.
+    if not server_config.check_before_start(instance, log):
+        log("❌ Restart cancelled; the running server was left as is.")
+        return
+    log("🔁 Restarting server...")
+    # stop_server only returns once the old process is confirmed gone, so the new one
+    # starts immediately instead of after a fixed sleep.
+    if not _handle_stop(instance, log):
+        log("❌ Restart aborted: the old server process is still running.")
+        return
+    _start(instance, log)
+    runtime_stats.increment("restarts", instance_id=instance.id)
+
+_HANDLERS = {
+    "start": _handle_start,
+    "stop": _handle_stop,
+    "restart": _handle_restart,
+    "validate": _handle_validate,
+    "recover": _handle_recover,
+    "prestage": _handle_prestage,
+}
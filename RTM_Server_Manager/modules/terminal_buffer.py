@@ -0,0 +1,60 @@
+import threading
+from collections import deque
+from datetime import datetime
+from modules import log_sink
+
+DEFAULT_CAPACITY = 5000
+
+
+class TerminalBuffer:
+    # Thread-safe line buffer for the terminal view.
+    # Writers only append to a pending list; the GUI drains it on a timer, keeps the
+    # newest lines in a fixed-size ring and hands everything to the terminal log sink so
+    # older lines can be paged back in on demand.
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, sink=None):
+        self.capacity = capacity
+        self.lines = deque(maxlen=capacity)
+        self.total_lines = 0
+        self.sink = sink or log_sink.terminal
+        self._first_sink_line = self.sink.lines_written
+
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def append(self, message, timestamp=None):
+        with self._lock:
+            self._pending.append((timestamp or datetime.now(), message))
+
+    def drain(self):
+        with self._lock:
+            if not self._pending:
+                return []
+            batch, self._pending = self._pending, []
+
+        lines = []
+        for timestamp, message in batch:
+            prefix = timestamp.strftime("[%H:%M:%S]")
+            for line in str(message).split("\n"):
+                self.sink.write(line, timestamp)
+                lines.append(f"{prefix} {line}")
+
+        self.lines.extend(lines)
+        self.total_lines += len(lines)
+        return lines
+
+    def read_history(self, end, count):
+        # Returns history lines [end - count, end), read back from the log sink. Called on
+        # the GUI thread, so it never waits on the sink's writer; unflushed lines are skipped.
+        start = max(0, end - count)
+        if start >= end:
+            return []
+        raw = self.sink.read_lines(self._first_sink_line + start, self._first_sink_line + end, wait=False)
+        lines = []
+        for line in raw:
+            stamp, message = log_sink.parse_line(line)
+            lines.append(f"[{stamp[11:19]}] {message}")
+        return lines
+
+    def close(self):
+        self.sink.flush()
@@ -0,0 +1,136 @@
+import time
+import queue
+import threading
+from modules.logger import log_error
+
+# Background webhook sender.
+# Callers enqueue and return immediately; one worker thread coalesces bursts into a
+# single post over a pooled session, honours Discord 429/Retry-After and rate-limit
+# headers, and retries network/5xx failures with exponential backoff.
+
+BATCH_WINDOW = 1.0          # seconds to wait for more messages before posting
+MAX_CONTENT_LENGTH = 2000   # Discord message limit
+REQUEST_TIMEOUT = (5, 10)   # connect, read
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+QUEUE_SIZE = 500
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_session = None
+_worker = None
+_worker_lock = threading.Lock()
+_blocked_until = 0.0
+
+def send(url, message, callback=None):
+    # callback(ok, detail) is invoked on the worker thread once the post settles.
+    _ensure_worker()
+    try:
+        _queue.put_nowait((url, message, callback))
+    except queue.Full:
+        log_error("[webhook_dispatcher] Queue full, dropping webhook message.")
+        if callback:
+            callback(False, "queue full")
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_worker_loop, daemon=True)
+        _worker.start()
+
+def _worker_loop():
+    global _session
+    # requests takes a noticeable share of startup, so it loads here on first send.
+    import requests
+    if _session is None:
+        _session = requests.Session()
+    carry = None
+    while True:
+        item = carry or _queue.get()
+        carry = None
+        url, message, callback = item
+        parts = [message[:MAX_CONTENT_LENGTH]]
+        callbacks = [callback] if callback else []
+        length = len(parts[0])
+
+        deadline = time.monotonic() + BATCH_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                nxt = _queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            next_url, next_message, next_callback = nxt
+            next_message = next_message[:MAX_CONTENT_LENGTH]
+            if next_url != url or length + 1 + len(next_message) > MAX_CONTENT_LENGTH:
+                carry = nxt
+                break
+            parts.append(next_message)
+            length += 1 + len(next_message)
+            if next_callback:
+                callbacks.append(next_callback)
+
+        ok, detail = _post(url, "\n".join(parts))
+        for cb in callbacks:
+            try:
+                cb(ok, detail)
+            except Exception as e:
+                log_error(f"[webhook_dispatcher] Callback failed: {e}")
+
+def _retry_after(response):
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get("retry_after", 1.0))
+    except Exception:
+        return 1.0
+
+def _post(url, content):
+    global _blocked_until
+    import requests
+    detail = ""
+    backoff = BACKOFF_BASE
+    for attempt in range(MAX_ATTEMPTS):
+        wait = _blocked_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        try:
+            response = _session.post(url, json={"content": content}, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            detail = str(e)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX)
+            continue
+
+        # Respect the bucket even on success so the next post doesn't trip a 429.
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(response.headers.get("X-RateLimit-Reset-After", 0))
+                _blocked_until = max(_blocked_until, time.monotonic() + reset_after)
+            except ValueError:
+                pass
+
+        if 200 <= response.status_code < 300:
+            return True, str(response.status_code)
+
+        detail = f"{response.status_code} - {response.text[:200]}"
+        if response.status_code == 429:
+            _blocked_until = time.monotonic() + _retry_after(response)
+            continue
+        if response.status_code >= 500:
+            time.sleep(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX)
+            continue
+        break
+
+    log_error(f"[webhook_dispatcher] Webhook send failed: {detail}")
+    return False, detail
@@ -13,11 +13,28 @@ def print_welcome(log):
     log("start              Start the Moria server")
     log("stop               Stop the server gracefully")
     log("status             Check if the server is running")
-    log("restart            Restart the server (stop, wait, then start)")
+    log("instances          List the managed server instances")
+    log("use <name>         Switch the active instance (commands and buttons act on it)")
+    log("restart            Restart the server (graceful stop, then start)")
+    log("validate           Run a full SteamCMD file validation (next start if running)")
+    log("prestage           Download a pending update now; it is applied at the next start")
+    log("cancel update      Abort a running SteamCMD download/validation")
+    log("config check       Validate MoriaServerConfig.ini and list changes a restart would apply")
+    log("ban <name|id>      Block a player in MoriaServerPermissions.txt (unban <name|id> to undo)")
+    log("banned             List blocked players")
+    log("permissions <name> Show a player's permissions entry")
+    log("permit <name> <o>  Set options, e.g. permit Gimli AllConstruction,AllStorage")
+    log("permissions import|export <file.csv|.json>  Bulk edit the permissions list (import! replaces it)")
+    log("sessions <name|id> Show a player's recorded sessions and total playtime")
+    log("peak hours         Players online by hour of day, peak and least populated hour")
+    log("rules              List MoriaServerRules.txt (rule add <text>, rule remove <n>)")
     log("notify test        Send a test desktop/webhook notification")
     log("set webhook <url>  Save a new Discord webhook to settings.json")
     log("update             Checks for RTMSM App Updates")
     log("monitor on         Enables performance monitor")
     log("monitor off        Disables performance monitor")
+    log("stats              Shows CPU/memory history (1h, 24h, 7d)")
+    log("exporter on/off    Serves Prometheus metrics on http://127.0.0.1:9877/metrics")
     log("help               Prints the help page to the terminal")
+    log("daemon stop        (headless daemon only) Stop all servers and exit the daemon")
     log("_____________________________________________________")
@@ -0,0 +1,48 @@
+import sys
+import argparse
+from multiprocessing import AuthenticationError
+from modules import control_channel
+
+# Thin client for the headless daemon; accepts the same commands as the GUI terminal.
+#   python rtmctl.py status
+#   python rtmctl.py -f restart      (keep printing output until Ctrl+C)
+#   python rtmctl.py                 (attach to the live output)
+#   python rtmctl.py daemon stop
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send a command to the RTM Server Manager daemon.")
+    parser.add_argument("command", nargs="*", help="terminal command, e.g. status, start, use <name>; omit to attach")
+    parser.add_argument("-f", "--follow", action="store_true", help="keep printing manager output after the command")
+    args = parser.parse_args(argv)
+    command = " ".join(args.command)
+    follow = args.follow or not command
+
+    try:
+        conn = control_channel.connect()
+    except AuthenticationError:
+        print(f"❌ The daemon rejected the control key in {control_channel.KEY_PATH}.")
+        return 1
+    except (OSError, EOFError):
+        print("❌ The RTM Server Manager daemon is not running. Start it with: python daemon.py")
+        return 1
+
+    try:
+        conn.send({"command": command, "follow": follow})
+        while True:
+            kind, payload = conn.recv()
+            if kind == control_channel.MSG_LINE:
+                print(payload, flush=True)
+            elif kind == control_channel.MSG_DONE and not follow:
+                break
+    except EOFError:
+        pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+    return 0
+
+if __name__ == "__main__":
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")
+    sys.exit(main())
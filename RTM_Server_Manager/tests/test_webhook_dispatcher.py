@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import webhook_dispatcher
+
+# Runs the dispatcher against a local stand-in for the Discord webhook endpoint.
+# Each test scripts the stand-in's responses and checks what was posted and when.
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.posts.append((time.monotonic(), json.loads(body)["content"]))
+            status, headers, payload = server.responses.pop(0) if server.responses else (204, {}, None)
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+        self.server.lock = threading.Lock()
+        self.server.posts = []
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+
+        self._saved = (webhook_dispatcher.BATCH_WINDOW, webhook_dispatcher.BACKOFF_BASE)
+        webhook_dispatcher.BATCH_WINDOW = 0.2
+        webhook_dispatcher.BACKOFF_BASE = 0.2
+        webhook_dispatcher._blocked_until = 0.0
+
+    def tearDown(self):
+        webhook_dispatcher.BATCH_WINDOW, webhook_dispatcher.BACKOFF_BASE = self._saved
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _send_all(self, messages, timeout=10):
+        results = []
+        done = threading.Event()
+
+        def callback(ok, detail):
+            results.append((ok, detail))
+            if len(results) == len(messages):
+                done.set()
+
+        for message in messages:
+            webhook_dispatcher.send(self.url, message, callback)
+        self.assertTrue(done.wait(timeout), "webhook posts did not settle")
+        return results
+
+    def test_burst_is_coalesced_into_one_post(self):
+        results = self._send_all(["first", "second", "third"])
+        self.assertTrue(all(ok for ok, _ in results))
+        self.assertEqual([content for _, content in self.server.posts], ["first\nsecond\nthird"])
+
+    def test_burst_respects_content_cap(self):
+        messages = ["x" * 900 for _ in range(5)]
+        self._send_all(messages)
+        posted = [content for _, content in self.server.posts]
+        self.assertGreater(len(posted), 1)
+        self.assertTrue(all(len(content) <= webhook_dispatcher.MAX_CONTENT_LENGTH for content in posted))
+        self.assertEqual(sum(content.count("x") for content in posted), 900 * 5)
+
+    def test_retry_after_header_is_respected(self):
+        self.server.responses = [(429, {"Retry-After": "0.5"}, {"message": "rate limited"})]
+        results = self._send_all(["hello"])
+        self.assertEqual(results, [(True, "204")])
+        (first, _), (second, _) = self.server.posts
+        self.assertGreaterEqual(second - first, 0.5)
+
+    def test_retry_after_json_body_is_respected(self):
+        self.server.responses = [(429, {}, {"message": "rate limited", "retry_after": 0.5})]
+        results = self._send_all(["hello"])
+        self.assertEqual(results, [(True, "204")])
+        (first, _), (second, _) = self.server.posts
+        self.assertGreaterEqual(second - first, 0.5)
+
+    def test_server_errors_back_off_exponentially(self):
+        self.server.responses = [(500, {}, None), (502, {}, None)]
+        results = self._send_all(["hello"])
+        self.assertEqual(results, [(True, "204")])
+        times = [stamp for stamp, _ in self.server.posts]
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[1] - times[0], 0.2)
+        self.assertGreaterEqual(times[2] - times[1], 0.4)
+
+    def test_gives_up_after_max_attempts(self):
+        self.server.responses = [(503, {}, None)] * webhook_dispatcher.MAX_ATTEMPTS
+        saved = webhook_dispatcher.BACKOFF_BASE
+        webhook_dispatcher.BACKOFF_BASE = 0.01
+        try:
+            results = self._send_all(["hello"])
+        finally:
+            webhook_dispatcher.BACKOFF_BASE = saved
+        self.assertFalse(results[0][0])
+        self.assertTrue(results[0][1].startswith("503"))
+        self.assertEqual(len(self.server.posts), webhook_dispatcher.MAX_ATTEMPTS)
+
+
+if __name__ == "__main__":
+    unittest.main()